@@ -0,0 +1,287 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Iterable, Iterator
+from hashlib import blake2b
+
+# Which user an observed address belongs to and on which chain, without
+# deriving the addresses of every salt again.
+#
+# The file is a header, the chain names, a blocked bloom filter and an
+# open addressing table. A table slot holds an 11-byte hash of the
+# address, the chain (0 marks an empty slot) and the user id. The slot
+# and the bloom bits of an address are taken from that hash too.
+#
+# Entries added after a save can be appended to a log next to the file
+# instead, in blocks of the chain names and the new slots. `load` reads
+# the log back and the next `save` folds it into the table.
+
+MAGIC = b"ADDRTBL1"
+HEADER = struct.Struct("<8sQQQI")  # magic, count, slots, bloom words, chains size
+SLOT = struct.Struct("<11sBI")
+WORD = struct.Struct("<Q")
+LOG_BLOCK = struct.Struct("<II")  # chains size, entries
+KEY_SIZE = 11
+LOAD_FACTOR = 0.75
+# ~1% false positives with the 6 bits an address sets in one 64-bit word
+BLOOM_BITS_PER_ENTRY = 12
+# the two bits 12 bits of the hash pick, three lookups give the 6 bits
+_BIT_PAIRS = tuple(1 << (i & 63) | 1 << (i >> 6) for i in range(4096))
+
+
+def address_key(address: str) -> bytes:
+    # hex and bech32 addresses are both case-insensitive
+    return blake2b(address.strip().lower().encode(), digest_size=KEY_SIZE).digest()
+
+
+def _bloom_bits(key: bytes, words: int) -> tuple[int, int]:
+    """Word index and the mask of the bits `key` sets in it."""
+    bits = int.from_bytes(key[5:], "little")
+    mask = (
+        _BIT_PAIRS[bits & 4095]
+        | _BIT_PAIRS[bits >> 12 & 4095]
+        | _BIT_PAIRS[bits >> 24 & 4095]
+    )
+    return int.from_bytes(key[:5], "little") % words, mask
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _value(user_id: int, code: int) -> int:
+    # a slot stores the user id in 4 bytes
+    if not 0 <= user_id <= 0xFFFFFFFF:
+        raise ValueError(f"user id {user_id} does not fit in 32 bits")
+    return user_id << 8 | code
+
+
+class AddressTable:
+    """Address -> (user id, chain) for the deposit addresses of all users.
+
+    A table is loaded with `load`, which maps the file read-only so that
+    workers share its pages. `add` and `add_many` keep new entries in
+    memory until `append` adds them to the log or `save` writes them to the
+    file together with the loaded ones. Lookups check the new entries, then
+    the bloom filter, which rejects most addresses that are not ours, then
+    the table. They can run in other threads while `save` swaps the file.
+    """
+
+    def __init__(self):
+        self.chains: list[str] = []
+        self._chain_codes: dict[str, int] = {}
+        # key -> user id << 8 | chain code, entries that are not in the file
+        self._added: dict[bytes, int] = {}
+        # keys of the ones that are not in the log either
+        self._pending: list[bytes] = []
+        # entries in the log
+        self.logged = 0
+        self._mm: mmap.mmap | None = None
+        # held by lookups and while the file is swapped under them
+        self._lock = threading.Lock()
+        self._count = 0
+        self._slots = 0
+        self._words = 0
+        self._bloom_offset = 0
+        self._table_offset = 0
+
+    @classmethod
+    def load(cls, path: str) -> "AddressTable":
+        table = cls()
+        table._open(path)
+        table._replay(f"{path}.log")
+        return table
+
+    def _open(self, path: str) -> None:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, slots, words, chains_size = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            mm.close()
+            raise ValueError(f"{path} is not an address table")
+        self.chains = json.loads(mm[HEADER.size : HEADER.size + chains_size])
+        self._chain_codes = {chain: i + 1 for i, chain in enumerate(self.chains)}
+        self._mm = mm
+        self._count, self._slots, self._words = count, slots, words
+        self._bloom_offset = _align(HEADER.size + chains_size)
+        self._table_offset = self._bloom_offset + words * WORD.size
+
+    def _replay(self, log_path: str) -> None:
+        try:
+            with open(log_path, "rb") as f:
+                log = f.read()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while offset + LOG_BLOCK.size <= len(log):
+            chains_size, count = LOG_BLOCK.unpack_from(log, offset)
+            start = offset + LOG_BLOCK.size + chains_size
+            end = start + count * SLOT.size
+            if end > len(log):
+                break
+            # chains are only appended, the last block has all of them
+            self.chains = json.loads(log[offset + LOG_BLOCK.size : start])
+            for key, code, user_id in SLOT.iter_unpack(log[start:end]):
+                self._added[key] = user_id << 8 | code
+            self.logged += count
+            offset = end
+        self._chain_codes = {chain: i + 1 for i, chain in enumerate(self.chains)}
+        if offset < len(log):
+            # a block cut off by a crash, later appends go after the last whole one
+            os.truncate(log_path, offset)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._count = self._slots = self._words = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count + sum(
+                1 for key in self._added if self._find(key) is None
+            )
+
+    def _chain_code(self, chain: str) -> int:
+        code = self._chain_codes.get(chain)
+        if code is None:
+            if len(self.chains) == 255:
+                raise ValueError("at most 255 chains are supported")
+            self.chains.append(chain)
+            code = self._chain_codes[chain] = len(self.chains)
+        return code
+
+    def add(self, address: str, user_id: int, chain: str) -> None:
+        value = _value(user_id, self._chain_code(chain))
+        key = address_key(address)
+        self._added[key] = value
+        self._pending.append(key)
+
+    def add_many(self, chain: str, entries: Iterable[tuple[int, str]]) -> None:
+        """Add (user id, address) pairs of one chain."""
+        code = self._chain_code(chain)
+        added = {
+            address_key(address): _value(user_id, code) for user_id, address in entries
+        }
+        self._added.update(added)
+        self._pending.extend(added)
+
+    def get(self, address: str) -> tuple[int, str] | None:
+        """Return (user id, chain) of a deposit address, None for any other."""
+        key = address_key(address)
+        with self._lock:
+            value = self._added.get(key) if self._added else None
+            if value is not None:
+                return value >> 8, self.chains[(value & 0xFF) - 1]
+            hit = self._find(key)
+        if hit is None:
+            return None
+        user_id, code = hit
+        return user_id, self.chains[code - 1]
+
+    def _find(self, key: bytes) -> tuple[int, int] | None:
+        mm = self._mm
+        if mm is None:
+            return None
+        index, mask = _bloom_bits(key, self._words)
+        (word,) = WORD.unpack_from(mm, self._bloom_offset + index * WORD.size)
+        if word & mask != mask:
+            return None
+        slot = int.from_bytes(key[:8], "little") % self._slots
+        while True:
+            slot_key, code, user_id = SLOT.unpack_from(
+                mm, self._table_offset + slot * SLOT.size
+            )
+            if code == 0:
+                return None
+            if slot_key == key:
+                return user_id, code
+            slot += 1
+            if slot == self._slots:
+                slot = 0
+
+    def _entries(self) -> Iterator[tuple[bytes, int, int]]:
+        """(key, user id, chain code) of every entry."""
+        if self._mm is not None:
+            for offset in range(
+                self._table_offset,
+                self._table_offset + self._slots * SLOT.size,
+                SLOT.size,
+            ):
+                key, code, user_id = SLOT.unpack_from(self._mm, offset)
+                if code and key not in self._added:
+                    yield key, user_id, code
+        for key, value in self._added.items():
+            yield key, value >> 8, value & 0xFF
+
+    def append(self, path: str) -> None:
+        """Append the entries added since the last `append` or `save` to the
+        log of `path`, without rewriting the table."""
+        if not self._pending:
+            return
+        chains = json.dumps(self.chains).encode()
+        block = bytearray(LOG_BLOCK.pack(len(chains), len(self._pending)))
+        block += chains
+        for key in self._pending:
+            value = self._added[key]
+            block += SLOT.pack(key, value & 0xFF, value >> 8)
+        with open(f"{path}.log", "ab") as f:
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        self.logged += len(self._pending)
+        self._pending = []
+
+    def save(self, path: str) -> None:
+        """Write every entry to `path` and serve the lookups from it.
+
+        The file is written next to `path` and renamed over it, tables
+        loaded from the old file keep their mapping. The log of `path` is
+        removed, its entries are in the file now.
+        """
+        count = len(self)
+        slots = int(count / LOAD_FACTOR) + 1
+        words = (count * BLOOM_BITS_PER_ENTRY + 63) // 64 or 1
+        chains = json.dumps(self.chains).encode()
+        bloom_offset = _align(HEADER.size + len(chains))
+
+        bloom = [0] * words
+        table = bytearray(slots * SLOT.size)
+        for key, user_id, code in self._entries():
+            index, mask = _bloom_bits(key, words)
+            bloom[index] |= mask
+            slot = int.from_bytes(key[:8], "little") % slots
+            # the entries are unique, so the first free slot is ours
+            while table[slot * SLOT.size + KEY_SIZE]:
+                slot += 1
+                if slot == slots:
+                    slot = 0
+            SLOT.pack_into(table, slot * SLOT.size, key, code, user_id)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, count, slots, words, len(chains)))
+            f.write(chains)
+            f.write(bytes(bloom_offset - HEADER.size - len(chains)))
+            f.write(struct.pack(f"<{words}Q", *bloom))
+            f.write(table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        try:
+            os.remove(f"{path}.log")
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self._close()
+            self._added = {}
+            self._pending = []
+            self.logged = 0
+            self._open(path)
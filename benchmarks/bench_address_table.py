@@ -0,0 +1,127 @@
+"""Build an address_table.AddressTable with 10M addresses and time lookups.
+
+Addresses are synthetic EVM, Taproot and Aptos shaped strings, the table
+hashes them all the same way. The table is built in steps with a save
+after each, as it would be while users are added. Adding a few users
+with `append` is compared with `save`. Lookups of our addresses and of
+random ones are compared with deriving the address of every salt.
+
+Usage: python benchmarks/bench_address_table.py [entries] [steps]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from hashlib import blake2b
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from address_table import WORD, AddressTable, _bloom_bits, address_key
+from id2address_evm import iter_create2_addresses
+
+CHAINS = ("EVM", "BTC", "APT")
+BECH32 = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+LOOKUPS = 200_000
+FACTORY = "0x06bcEa7a0cf5AA9A28cB3c6C8e799Ac4D44024e3"
+BYTECODE_HASH = "0x2da6a0b42d3d9a39b48fa6b598ed1e3db10547faf2922de05a9953ef7de23de6"
+
+
+def address(i: int) -> str:
+    """The address of user i on CHAINS[i % 3], the same on every call."""
+    digest = blake2b(i.to_bytes(8, "little"), digest_size=32).digest()
+    chain = CHAINS[i % 3]
+    if chain == "EVM":
+        return "0x" + digest[:20].hex()
+    if chain == "APT":
+        return "0x" + digest.hex()
+    return "bc1p" + "".join(BECH32[b & 31] for b in digest + digest[:26])
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def lookups(table: AddressTable, addresses: list[str]) -> int:
+    return sum(table.get(address) is not None for address in addresses)
+
+
+def bloom_passes(table: AddressTable, addresses: list[str]) -> int:
+    """How many of `addresses` the bloom filter lets through to the table."""
+    passed = 0
+    for address in addresses:
+        index, mask = _bloom_bits(address_key(address), table._words)
+        (word,) = WORD.unpack_from(table._mm, table._bloom_offset + index * WORD.size)
+        passed += word & mask == mask
+    return passed
+
+
+if __name__ == "__main__":
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "addresses.bin")
+        table = AddressTable()
+        bounds = [entries * step // steps for step in range(steps + 1)]
+        for start, end in zip(bounds, bounds[1:]):
+            t0 = time.perf_counter()
+            for code, chain in enumerate(CHAINS):
+                first = start + (code - start) % 3
+                table.add_many(chain, ((i, address(i)) for i in range(first, end, 3)))
+            t1 = time.perf_counter()
+            table.save(path)
+            print(
+                f"{end:>10} entries: add {t1 - t0:6.1f} s,"
+                f" save {time.perf_counter() - t1:6.1f} s"
+            )
+        size = os.path.getsize(path)
+        print(f"  file: {size / 1e6:.0f} MB, {size / entries:.1f} bytes per entry")
+
+        new = range(entries, entries + 100)
+        table.add_many("EVM", ((i, address(i)) for i in new))
+        append = timed(table.append, path)
+        save = timed(table.save, path)
+        print(
+            f"  100 new users: append {append * 1e3:.2f} ms, save {save * 1e3:.0f} ms"
+        )
+        table.close()
+
+        load = timed(AddressTable.load, path)
+        table = AddressTable.load(path)
+        print(f"  load (mmap): {load * 1e3:.2f} ms")
+
+        rng = random.Random(0)
+        hit_ids = rng.sample(range(entries), min(LOOKUPS, entries))
+        assert all(table.get(address(i)) == (i, CHAINS[i % 3]) for i in hit_ids[:1000])
+        hits = [address(i) for i in hit_ids]
+        misses = [address(entries + 100 + i) for i in range(LOOKUPS)]
+
+        # the first pass faults the pages of the mapping in
+        cold = timed(lookups, table, hits) / len(hits)
+        warm = timed(lookups, table, hits) / len(hits)
+        start = time.perf_counter()
+        false_hits = lookups(table, misses)
+        miss = (time.perf_counter() - start) / len(misses)
+        print(
+            f"  hit:  {cold * 1e6:.2f} us cold, {warm * 1e6:.2f} us warm"
+            f" ({1 / warm / 1e3:.0f}k/s)"
+        )
+        print(
+            f"  miss: {miss * 1e6:.2f} us ({1 / miss / 1e3:.0f}k/s),"
+            f" {false_hits} false hits"
+        )
+        passed = bloom_passes(table, misses)
+        print(f"  bloom passes {passed / len(misses):.2%} of misses to the table")
+
+        salts = range(10_000)
+        derive = timed(
+            lambda: list(iter_create2_addresses(FACTORY, salts, BYTECODE_HASH))
+        )
+        print(
+            f"  deriving the EVM address of every salt instead:"
+            f" {derive / len(salts) * entries:.0f} s per lookup (estimated)"
+        )
+        table.close()
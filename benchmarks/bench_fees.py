@@ -0,0 +1,164 @@
+"""RPC calls, submit latency and fees of executeDeposit submissions.
+
+Compares the old path (eth_estimateGas + eth_gasPrice * 3 for every tx)
+with the fee engine (EIP-1559 fees cached per head, gas estimated per
+tx over a floor per calldata shape). A stub executor that accepts any call is deployed, so
+only the submission path is measured.
+
+Usage: python benchmarks/bench_fees.py [txs] [rpc]
+
+Without `rpc` an in-process eth-tester node is used. With one, e.g. a
+local anvil or hardhat node, PRIVATE_KEY must hold a funded key.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "symmio"))
+)
+
+from eth_account import Account
+from web3 import AsyncEthereumTesterProvider, AsyncWeb3
+
+from bench_parse_deposit import build_tx
+from chain import ChainClient
+from fees import Eip1559Fees, GasEstimates
+from submitter import DepositSubmitter
+
+# returns 32 bytes for any calldata
+STUB_EXECUTOR = "0x600a600c600039600a6000f3602a60005260206000f3"
+EXECUTE_DEPOSIT_ABI = [
+    {
+        "type": "function",
+        "name": "executeDeposit",
+        "stateMutability": "nonpayable",
+        "inputs": [{"name": "txData", "type": "bytes"}],
+        "outputs": [],
+    }
+]
+ANVIL_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcb7c35d2e8bf1bc3ab"
+
+
+class OldFees:
+    def __init__(self, w3: AsyncWeb3):
+        self.w3 = w3
+
+    async def fees(self) -> dict[str, int]:
+        return {"gasPrice": await self.w3.eth.gas_price * 3}
+
+
+class AlwaysEstimate(GasEstimates):
+    async def gas(self, shape, estimate) -> int:
+        return await estimate()
+
+
+class RequestCounter:
+    """Counts the JSON-RPC requests a web3 instance makes."""
+
+    def __init__(self, w3: AsyncWeb3):
+        self.manager = w3.manager
+        self.calls = 0
+        self._make_request = self.manager._coro_make_request
+        self.manager._coro_make_request = self.make_request
+
+    async def make_request(self, method, params):
+        self.calls += 1
+        return await self._make_request(method, params)
+
+    def close(self) -> None:
+        del self.manager._coro_make_request
+
+
+async def setup(rpc: str | None):
+    if rpc is None:
+        w3 = AsyncWeb3(AsyncEthereumTesterProvider())
+        account = Account.create()
+        funder = (await w3.eth.accounts)[0]
+        await w3.eth.send_transaction(
+            {"from": funder, "to": account.address, "value": 10**21}
+        )
+    else:
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc))
+        account = Account.from_key(os.environ.get("PRIVATE_KEY", ANVIL_KEY))
+
+    deploy = account.sign_transaction(
+        {
+            "data": STUB_EXECUTOR,
+            "gas": 100_000,
+            "gasPrice": await w3.eth.gas_price * 2,
+            "nonce": await w3.eth.get_transaction_count(account.address),
+            "chainId": await w3.eth.chain_id,
+        }
+    )
+    receipt = await w3.eth.wait_for_transaction_receipt(
+        await w3.eth.send_raw_transaction(deploy.raw_transaction)
+    )
+    address = receipt.contractAddress
+
+    client = ChainClient(
+        rpc or "http://127.0.0.1:8545",
+        address,
+        EXECUTE_DEPOSIT_ABI,
+        address,
+        EXECUTE_DEPOSIT_ABI,
+    )
+    if rpc is None:
+        client.w3 = w3
+        client.deposit_executor = w3.eth.contract(
+            address=address, abi=EXECUTE_DEPOSIT_ABI
+        )
+    else:
+        await client.start()
+    return client, account
+
+
+async def run(label: str, client: ChainClient, submitter, txs: list[bytes]):
+    counter = RequestCounter(client.w3)
+    start = time.perf_counter()
+    tx_hashes = [await submitter.submit([tx]) for tx in txs]
+    elapsed = time.perf_counter() - start
+    calls = counter.calls
+    await submitter.drain()
+    counter.close()
+
+    paid = 0
+    for tx_hash in tx_hashes:
+        receipt = await client.w3.eth.get_transaction_receipt(tx_hash)
+        paid += receipt.gasUsed * receipt.effectiveGasPrice
+    print(
+        f"  {label:<12} {elapsed / len(txs) * 1e3:8.2f} ms/tx"
+        f" {calls / len(txs):6.2f} rpc calls/tx"
+        f" {paid / len(txs) / 1e9:12,.0f} gwei fees/tx"
+    )
+
+
+async def main(count: int, rpc: str | None) -> None:
+    client, account = await setup(rpc)
+    # a few shapes, as with batches of different sizes
+    txs = [build_tx(1 + i % 4) for i in range(count)]
+    print(f"{count} txs against {rpc or 'eth-tester'}")
+
+    old = DepositSubmitter(
+        client.w3,
+        account,
+        client.deposit_executor,
+        OldFees(client.w3),
+        AlwaysEstimate(),
+    )
+    await run("old", client, old, txs)
+
+    engine = DepositSubmitter(
+        client.w3, account, client.deposit_executor, Eip1559Fees(client)
+    )
+    await run("fee engine", client, engine, txs)
+    await client.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rpc = sys.argv[2] if len(sys.argv) > 2 else None
+    asyncio.run(main(count, rpc))
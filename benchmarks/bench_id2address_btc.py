@@ -0,0 +1,52 @@
+"""Addresses per second for Taproot deposit address derivation.
+
+Usage: python benchmarks/bench_id2address_btc.py [salts]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from id2address_btc import (
+    bulk_taproot_addresses,
+    get_taproot_address,
+    iter_taproot_addresses,
+    taproot_verifying_key,
+)
+
+FIRST_SALT = 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061
+
+
+def rate(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {count / elapsed:12,.0f} addresses/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    salts = range(FIRST_SALT, FIRST_SALT + count)
+
+    for salt, address in iter_taproot_addresses(taproot_verifying_key, salts[:100]):
+        assert address == get_taproot_address(taproot_verifying_key, salt)
+
+    print(f"{count} salts, {os.cpu_count()} cores")
+    single = salts[: max(1, count // 100)]
+    rate(
+        "get_taproot_address",
+        len(single),
+        lambda: [get_taproot_address(taproot_verifying_key, s) for s in single],
+    )
+    rate(
+        "iter_taproot_addresses",
+        count,
+        lambda: list(iter_taproot_addresses(taproot_verifying_key, salts)),
+    )
+    rate(
+        "bulk_taproot_addresses",
+        count,
+        lambda: list(bulk_taproot_addresses(taproot_verifying_key, salts)),
+    )
@@ -0,0 +1,64 @@
+"""Addresses per second for CREATE2 deposit address derivation.
+
+Usage: python benchmarks/bench_id2address_evm.py [salts]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from id2address_evm import (
+    bulk_create2_addresses,
+    get_create2_address,
+    iter_create2_addresses,
+)
+
+FACTORY_ADDRESS = "0x06bcEa7a0cf5AA9A28cB3c6C8e799Ac4D44024e3"
+BYTECODE_HASH = "0x2da6a0b42d3d9a39b48fa6b598ed1e3db10547faf2922de05a9953ef7de23de6"
+FIRST_SALT = 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061
+
+
+def rate(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {count / elapsed:12,.0f} addresses/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    salts = range(FIRST_SALT, FIRST_SALT + count)
+
+    for salt, address in iter_create2_addresses(
+        FACTORY_ADDRESS, salts[:100], BYTECODE_HASH, checksum=True
+    ):
+        assert address == get_create2_address(FACTORY_ADDRESS, salt, BYTECODE_HASH)
+
+    print(f"{count} salts, {os.cpu_count()} cores")
+    single = salts[: count // 10]
+    rate(
+        "get_create2_address",
+        len(single),
+        lambda: [
+            get_create2_address(FACTORY_ADDRESS, s, BYTECODE_HASH) for s in single
+        ],
+    )
+    rate(
+        "iter_create2_addresses",
+        count,
+        lambda: list(iter_create2_addresses(FACTORY_ADDRESS, salts, BYTECODE_HASH)),
+    )
+    rate(
+        "iter_create2_addresses checksum",
+        count,
+        lambda: list(
+            iter_create2_addresses(FACTORY_ADDRESS, salts, BYTECODE_HASH, checksum=True)
+        ),
+    )
+    rate(
+        "bulk_create2_addresses",
+        count,
+        lambda: list(bulk_create2_addresses(FACTORY_ADDRESS, salts, BYTECODE_HASH)),
+    )
@@ -0,0 +1,76 @@
+"""Check the import time of both apps against a budget.
+
+Each app is imported in a fresh interpreter with `-X importtime`, the
+fastest of `--runs` imports is compared with its budget and the modules
+that took longest are listed. Exits with status 1 when an app is over.
+
+Usage: python benchmarks/bench_import_time.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# app -> (directory it is started from, budget in seconds)
+APPS = {
+    "main": (ROOT, 0.9),
+    "symmio.main": (os.path.join(ROOT, "symmio"), 1.0),
+}
+# only read on startup, but the relayer checks it is set
+ENV = {"PRIVATE_KEY": "0x" + "11" * 32}
+
+
+def import_times(cwd: str) -> tuple[int, list[tuple[int, str]]]:
+    """Import `main` from `cwd`.
+
+    Returns its cumulative microseconds and those of each module it
+    imports directly.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=cwd,
+        env={**os.environ, **ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # modules are listed after what they import, indented by 2 per level
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), module))
+        elif depth == 0:
+            if module == "main":
+                return int(cumulative), sorted(children, reverse=True)
+            children = []
+    raise RuntimeError(f"main was not imported from {cwd}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    over = False
+    for app, (cwd, budget) in APPS.items():
+        total, children = min(import_times(cwd) for _ in range(args.runs))
+        total /= 1e6
+        status = "ok" if total <= budget else "OVER BUDGET"
+        print(f"{app}: {total:.3f}s (budget {budget:.3f}s) {status}")
+        for cumulative, module in children[: args.top]:
+            print(f"  {cumulative / 1e3:9.1f} ms  {module}")
+        over |= total > budget
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
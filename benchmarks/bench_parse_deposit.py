@@ -0,0 +1,92 @@
+"""Compare the memoryview deposit parser with the original one.
+
+Usage: python benchmarks/bench_parse_deposit.py [deposits per tx ...]
+"""
+
+import os
+import sys
+import timeit
+from decimal import Decimal
+from struct import calcsize, pack, unpack
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from parse_deposit import Deposit, DepositTransaction, parse_deposit_tx
+
+
+def legacy_from_tx(tx: bytes) -> DepositTransaction:
+    """DepositTransaction.from_tx as it was before the fast path."""
+    header_format = ">B B 3s B B H"
+    header_size = calcsize(header_format)
+    version, operation, chain_bytes, tx_hash_len, token_contract_len, count = unpack(
+        header_format, tx[:header_size]
+    )
+    chain = chain_bytes.upper().decode()
+    prefix_fmt = f">{tx_hash_len}s {token_contract_len}s 32s B I"
+    prefix_size = calcsize(prefix_fmt)
+    offset = header_size
+    deposits = []
+    for _ in range(count):
+        tx_hash, token_contract, amount_bytes, decimal, t = unpack(
+            prefix_fmt, tx[offset : offset + prefix_size]
+        )
+        offset += prefix_size
+        salt_len = tx[offset]
+        offset += 1
+        salt = tx[offset : offset + salt_len].hex()
+        offset += salt_len
+        vout = tx[offset]
+        offset += 1
+        amount_int = int.from_bytes(amount_bytes, "big")
+        amount = Decimal(amount_int) / (Decimal(10) ** Decimal(decimal))
+        deposits.append(
+            Deposit(
+                tx_hash=tx_hash.hex(),
+                chain=chain,
+                token_contract="0x" + token_contract.hex(),
+                amount=amount,
+                decimal=decimal,
+                time=t,
+                salt=salt,
+                vout=vout,
+            )
+        )
+    return DepositTransaction(
+        version=version, operation=chr(operation), chain=chain, deposits=deposits
+    )
+
+
+def build_tx(count: int) -> bytes:
+    tx = pack(">B B 3s B B H", 1, ord("d"), b"sep", 32, 20, count)
+    for i in range(count):
+        salt = (0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + i).to_bytes(20, "big")
+        tx += pack(
+            ">32s 20s 32s B I",
+            i.to_bytes(32, "big"),
+            bytes(20),
+            (1_390_000 + i).to_bytes(32, "big"),
+            6,
+            1759146986,
+        )
+        tx += bytes([len(salt)]) + salt + bytes([i % 256])
+    return tx + bytes(129)
+
+
+def bench(label: str, func, tx: bytes, number: int) -> float:
+    seconds = min(timeit.repeat(lambda: func(tx), number=number, repeat=5))
+    per_call = seconds / number * 1e6
+    print(f"  {label:<28} {per_call:10.1f} us/tx")
+    return per_call
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000]
+    for count in counts:
+        tx = build_tx(count)
+        assert legacy_from_tx(tx) == DepositTransaction.from_tx(tx)
+        number = max(1, 20_000 // count)
+        print(f"{count} deposits per tx")
+        legacy = bench("legacy from_tx", legacy_from_tx, tx, number)
+        fast = bench("from_tx", DepositTransaction.from_tx, tx, number)
+        raw = bench("parse_deposit_tx", parse_deposit_tx, tx, number)
+        print(f"  speedup: from_tx {legacy / fast:.1f}x, raw {legacy / raw:.1f}x")
@@ -0,0 +1,136 @@
+"""Time /users paging queries and salt lookups on a salts table with 1M rows.
+
+Usage: python benchmarks/bench_users.py [rows]
+"""
+
+import os
+import sqlite3
+import sys
+import random
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "symmio"))
+)
+
+from storage import Storage
+
+PAGE = 100
+
+
+def create_db(path: str, rows: int) -> Storage:
+    storage = Storage(path)
+    storage.init()
+    storage.insert_eth_addresses(
+        [
+            "0x%040x" % (0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + i)
+            for i in range(rows)
+        ]
+    )
+    return storage
+
+
+def legacy_page(path: str, offset: int) -> list:
+    """/users before paging moved into SQLite: new connection, full scan."""
+    con = sqlite3.connect(path, timeout=10)
+    try:
+        rows = con.execute("SELECT id, address FROM salts ORDER BY id").fetchall()
+    finally:
+        con.close()
+    return rows[offset : offset + PAGE]
+
+
+def legacy_count(path: str) -> int:
+    con = sqlite3.connect(path, timeout=10)
+    try:
+        return con.execute("SELECT COUNT(*) FROM salts").fetchone()[0]
+    finally:
+        con.close()
+
+
+def sql_find_users(storage: Storage, salts: list[str]) -> dict[str, int]:
+    """Salt -> user id with a query per salt on the address index.
+
+    The ids of this table have no gaps, so the position is id - 1.
+    """
+    found = {}
+    with storage.connection() as con:
+        for salt in salts:
+            row = con.execute(
+                "SELECT id - 1 FROM salts WHERE address = ?", ("0x" + salt,)
+            ).fetchone()
+            if row is not None:
+                found[salt] = row[0]
+    return found
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "relayer.db")
+        storage = create_db(path, rows)
+        print(f"{rows} users, {PAGE} per page")
+        for offset in (0, rows // 2, rows - PAGE):
+            old = timed(legacy_page, path, offset)
+            cold = timed(storage.fetch_users, offset, PAGE)
+            warm = timed(storage.fetch_users, offset + PAGE, PAGE)
+            print(
+                f"  offset {offset:>9}: full scan {old * 1e3:9.2f} ms"
+                f"  LIMIT/OFFSET {cold * 1e3:7.3f} ms  keyset {warm * 1e3:6.3f} ms"
+            )
+
+        start = time.perf_counter()
+        for offset in range(0, rows, PAGE):
+            storage.fetch_users(offset, PAGE)
+        sync = time.perf_counter() - start
+        print(f"  full sync: {sync:.2f} s ({rows // PAGE} pages)")
+        estimate = timed(legacy_page, path, 0) * (rows // PAGE)
+        print(f"  full sync with full scans (estimated): {estimate:.0f} s")
+
+        old = min(timed(legacy_count, path) for _ in range(20))
+        new = min(timed(storage.count_users) for _ in range(20))
+        print(f"  count: COUNT(*) {old * 1e3:.2f} ms, index {new * 1e6:.2f} us")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        loaded = Storage(path)
+        loaded.init()
+        load = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        loaded.close()
+        print(
+            f"  index load: {load:.2f} s (with tracemalloc),"
+            f" {memory / rows:.0f} bytes per user"
+        )
+
+        salts = [
+            "%040x" % (0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + i)
+            for i in random.Random(0).sample(range(rows), 1000)
+        ]
+        assert storage.find_users(salts) == sql_find_users(storage, salts)
+        old = timed(sql_find_users, storage, salts) / len(salts)
+        new = timed(storage.find_users, salts) / len(salts)
+        print(f"  salt -> user: SQL {old * 1e6:.2f} us, index {new * 1e6:.2f} us")
+
+        start = time.perf_counter()
+        exported = 0
+        for addresses in storage.iter_users(10_000):
+            exported += len(
+                ",".join(
+                    f'{{"salt":{int(a, 0)},"id":{i}}}' for i, a in enumerate(addresses)
+                )
+            )
+        print(
+            f"  export: {time.perf_counter() - start:.2f} s"
+            f" ({exported / 1e6:.0f} MB of JSON)"
+        )
+        storage.close()
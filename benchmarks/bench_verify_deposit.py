@@ -0,0 +1,52 @@
+"""Per-verify cost of the FROST check with and without the cached key.
+
+Deposit txs are signed locally, see `deposit_txs.DepositTxSigner`.
+
+Usage: python benchmarks/bench_verify_deposit.py [txs]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from deposit_txs import DepositTxSigner
+from verify_deposit import FrostVerifier, verify_deposit_txs
+
+
+def bench(label: str, func, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"  {label:<32} {seconds / number * 1e6:10.1f} us/verify")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    signer = DepositTxSigner()
+    signer.install()
+    txs = signer.deposit_txs(count, 1)
+    assert all(verify_deposit_txs(txs))
+
+    key = signer.key
+    verifier = FrostVerifier(key)
+    tx = txs[0]
+    msg, frost_sig = tx[:-129], tx[-129:-65]
+    print(f"FROST verify, {count} txs for the batch")
+    try:
+        from frost_lib.curves import secp256k1_evm as curve
+    except ImportError:
+        curve = None
+    if curve is not None:
+        bench(
+            "frost_lib verify_group_signature",
+            lambda: curve.verify_group_signature(frost_sig.hex(), msg, key),
+            200,
+        )
+    bench(
+        "key decoded per call", lambda: FrostVerifier(key).verify(msg, frost_sig), 2000
+    )
+    bench("cached FrostVerifier", lambda: verifier.verify(msg, frost_sig), 2000)
+    seconds = min(timeit.repeat(lambda: verify_deposit_txs(txs), number=1, repeat=3))
+    print(
+        f"  {'verify_deposit_txs (FROST+ECDSA)':<32} {seconds / count * 1e6:10.1f} us/tx"
+    )
@@ -0,0 +1,69 @@
+"""Time the reference app's withdrawal queries with many withdrawals.
+
+Compares returning the whole in-memory list / probing a dict with the
+SQLite withdraw_store used by main.py.
+
+Usage: python benchmarks/bench_withdrawals.py [withdrawals]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from withdraw_store import WithdrawStore
+
+PAGE = 100
+IDS = 5000
+
+
+def make_withdrawals(count: int) -> list[dict]:
+    return [
+        {
+            "chain": "SEP",
+            "tokenContract": "0x6f8cbCf0b342f6a997874F8bf1430ADE5138e15a",
+            "amount": str(1_000_000 + i),
+            "destination": "0x7314b5cb4e67450ef311a1a5e0c79f0d7424072e",
+            "user_id": 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + i % 1000,
+            "t": 1753369254 + i,
+            "id": i,
+        }
+        for i in range(count)
+    ]
+
+
+def timed(label: str, func, number: int = 20) -> None:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    print(f"  {label:<28} {(time.perf_counter() - start) / number * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    withdrawals = make_withdrawals(count)
+    withdrawals_map = {w["id"]: w for w in withdrawals}
+    ids = random.sample(range(count), IDS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WithdrawStore(os.path.join(tmp, "withdrawals.db"))
+        store.init()
+        start = time.perf_counter()
+        store.add(withdrawals)
+        print(f"{count} withdrawals, stored in {time.perf_counter() - start:.2f} s")
+
+        timed("list count", lambda: len(withdrawals))
+        timed("store count", lambda: store.count("SEP"))
+        # the old /withdraws returned the whole list on every poll
+        timed("list, full history", lambda: list(withdrawals), 5)
+        timed(f"store page of {PAGE}", lambda: store.page("SEP", count - PAGE, PAGE))
+        timed(
+            f"map, {IDS} ids",
+            lambda: [withdrawals_map[i] for i in ids if i in withdrawals_map],
+        )
+        timed(f"store, {IDS} ids", lambda: store.get_many("SEP", ids))
+        # what a restart costs: the store is opened, not reloaded
+        timed("reopen + page", lambda: WithdrawStore(store.path).page("SEP", 0, PAGE))
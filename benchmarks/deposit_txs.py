@@ -0,0 +1,96 @@
+"""Synthetic deposit txs signed with locally generated keys.
+
+`DepositTxSigner` holds a FROST group key and a shield account and signs
+txs the way the custody service does, `install` points verify_deposit at
+them so the txs verify. Everything is derived from `seed`, the same seed
+gives the same txs.
+"""
+
+import os
+import random
+import sys
+from struct import pack
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import secp256k1
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_utils.crypto import keccak
+
+import verify_deposit
+from verify_deposit import HALF_Q, KEY, Q, FrostVerifier
+
+FIRST_SALT = 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061
+# (tx hash, token contract) lengths the custody service uses per chain
+CHAIN_FIELDS = {b"apt": (32, 32), b"sep": (32, 20)}
+
+
+def generate_frost_key(rng: random.Random) -> tuple[int, bytes]:
+    """A secret and compressed public key the on-chain verifier accepts."""
+    while True:
+        secret = rng.randrange(1, Q)
+        pubkey = secp256k1.PrivateKey(secret.to_bytes(32, "big")).pubkey
+        compressed = pubkey.serialize()
+        if int.from_bytes(compressed[1:], "big") < HALF_Q:
+            return secret, compressed
+
+
+def frost_sign(msg: bytes, secret: int, pubkey: bytes, nonce: int) -> bytes:
+    """Single-signer equivalent of the FROST secp256k1_evm signature (e, s)."""
+    point = secp256k1.PrivateKey(nonce.to_bytes(32, "big")).pubkey
+    nonce_address = keccak(point.serialize(compressed=False)[1:])[12:]
+    e = keccak(nonce_address + bytes([27 + pubkey[0] - 2]) + pubkey[1:] + keccak(msg))
+    s = (nonce + int.from_bytes(e, "big") * secret) % Q
+    return e + s.to_bytes(32, "big")
+
+
+def build_deposit_msg(
+    count: int, rng: random.Random, chain: bytes = b"apt", decimal: int = 8
+) -> bytes:
+    """The unsigned part of a deposit tx with `count` deposits."""
+    tx_hash_len, token_contract_len = CHAIN_FIELDS[chain]
+    msg = pack(
+        ">B B 3s B B H", 1, ord("d"), chain, tx_hash_len, token_contract_len, count
+    )
+    for i in range(count):
+        salt = (FIRST_SALT + rng.randrange(1_000_000)).to_bytes(20, "big")
+        msg += pack(
+            f">{tx_hash_len}s {token_contract_len}s 32s B I",
+            rng.randbytes(tx_hash_len),
+            bytes(token_contract_len),
+            rng.randrange(1, 10**12).to_bytes(32, "big"),
+            decimal,
+            1_757_000_000 + rng.randrange(1_000_000),
+        )
+        msg += bytes([len(salt)]) + salt + bytes([i % 256])
+    return msg
+
+
+class DepositTxSigner:
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.secret, self.pubkey = generate_frost_key(self.rng)
+        self.shield = Account.from_key(self.rng.randbytes(32))
+        self.key = KEY.model_copy(update={"verifying_key": self.pubkey.hex()})
+
+    def sign(self, msg: bytes) -> bytes:
+        frost_sig = frost_sign(msg, self.secret, self.pubkey, self.rng.randrange(1, Q))
+        ecdsa_sig = self.shield.sign_message(encode_defunct(msg)).signature
+        return msg + frost_sig + ecdsa_sig
+
+    def deposit_txs(
+        self, txs: int, deposits_per_tx: int, chain: bytes = b"apt"
+    ) -> list[bytes]:
+        return [
+            self.sign(build_deposit_msg(deposits_per_tx, self.rng, chain))
+            for _ in range(txs)
+        ]
+
+    def install(self) -> None:
+        """Make verify_deposit accept txs signed by this signer.
+
+        Process pools forked afterwards inherit it, spawned ones do not.
+        """
+        verify_deposit.frost_verifier = FrostVerifier(self.key)
+        verify_deposit.deposit_shield_address = self.shield.address
@@ -0,0 +1,344 @@
+"""Offline benchmark suite for the deposit and address hot paths.
+
+Deposit txs are generated and signed locally (see deposit_txs.py), the
+FastAPI routes of the reference main.py are called in-process, so no
+network or custody service is needed. Results are printed and written
+as JSON to compare runs across releases.
+
+Usage: python benchmarks/run_benchmarks.py [--deposits 1 10 100] [--txs 64]
+    [--only parse verify] [--output results.json]
+    [--compare baseline.json] [--threshold 1.2]
+
+With --compare the medians are compared with an earlier --output file
+and the exit code is 1 if any benchmark got slower than --threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from deposit_txs import FIRST_SALT, DepositTxSigner
+
+
+class Case(NamedTuple):
+    name: str
+    params: dict
+    # what one unit is, e.g. "tx", and how many of them one call handles
+    unit: str
+    items: int
+    func: Callable[[], object]
+
+
+# name -> function(args, signer) yielding the cases of a group
+GROUPS: dict[str, Callable[..., Iterator[Case]]] = {}
+
+
+def group(func):
+    GROUPS[func.__name__.removesuffix("_cases")] = func
+    return func
+
+
+@group
+def parse_cases(args, signer):
+    from parse_deposit import DepositTransaction, parse_deposit_tx
+
+    for count in args.deposits:
+        (tx,) = signer.deposit_txs(1, count)
+        params = {"deposits": count}
+        yield Case(
+            "parse.from_tx",
+            params,
+            "tx",
+            1,
+            lambda tx=tx: DepositTransaction.from_tx(tx),
+        )
+        yield Case(
+            "parse.parse_deposit_tx",
+            params,
+            "tx",
+            1,
+            lambda tx=tx: parse_deposit_tx(tx),
+        )
+
+
+@group
+def verify_cases(args, signer):
+    from verify_deposit import verify_deposit_tx, verify_deposit_txs
+
+    for count in args.deposits:
+        (tx,) = signer.deposit_txs(1, count)
+        assert verify_deposit_tx(tx)
+        yield Case(
+            "verify.verify_deposit_tx",
+            {"deposits": count},
+            "tx",
+            1,
+            lambda tx=tx: verify_deposit_tx(tx),
+        )
+    txs = signer.deposit_txs(args.txs, args.deposits[0])
+    yield Case(
+        "verify.verify_deposit_txs",
+        {"deposits": args.deposits[0], "txs": args.txs},
+        "tx",
+        args.txs,
+        lambda: verify_deposit_txs(txs),
+    )
+
+
+@group
+def id2address_cases(args, signer):
+    salts = range(FIRST_SALT, FIRST_SALT + args.salts)
+
+    from id2address_evm import get_create2_address, iter_create2_addresses
+
+    factory = "0x06bcEa7a0cf5AA9A28cB3c6C8e799Ac4D44024e3"
+    bytecode_hash = "0x2da6a0b42d3d9a39b48fa6b598ed1e3db10547faf2922de05a9953ef7de23de6"
+    yield Case(
+        "id2address.evm.get_create2_address",
+        {},
+        "address",
+        1,
+        lambda: get_create2_address(factory, FIRST_SALT, bytecode_hash),
+    )
+    yield Case(
+        "id2address.evm.iter_create2_addresses",
+        {"salts": args.salts},
+        "address",
+        args.salts,
+        lambda: list(iter_create2_addresses(factory, salts, bytecode_hash)),
+    )
+
+    from id2address_btc import (
+        get_taproot_address,
+        iter_taproot_addresses,
+        taproot_verifying_key,
+    )
+
+    yield Case(
+        "id2address.btc.get_taproot_address",
+        {},
+        "address",
+        1,
+        lambda: get_taproot_address(taproot_verifying_key, FIRST_SALT),
+    )
+    yield Case(
+        "id2address.btc.iter_taproot_addresses",
+        {"salts": args.salts},
+        "address",
+        args.salts,
+        lambda: list(iter_taproot_addresses(taproot_verifying_key, salts)),
+    )
+
+    from id2address_apt import _compute_apt_address
+
+    # past the lru_cache, every call derives the address
+    derive = _compute_apt_address.__wrapped__
+    yield Case(
+        "id2address.apt.compute_apt_address",
+        {},
+        "address",
+        1,
+        lambda: derive(hex(FIRST_SALT)),
+    )
+
+
+@group
+def routes_cases(args, signer):
+    from fastapi.testclient import TestClient
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["WITHDRAWALS_DB"] = os.path.join(tmp, "withdrawals.db")
+        import main
+
+        txs = signer.deposit_txs(args.txs, args.deposits[0])
+        payload = [tx.decode("latin-1") for tx in txs]
+        body = b"".join(len(tx).to_bytes(4, "big") + tx for tx in txs)
+        params = {"deposits": args.deposits[0], "txs": args.txs}
+
+        with TestClient(main.app) as client:
+
+            def post(path: str, **kwargs):
+                response = client.post(path, **kwargs)
+                assert response.status_code == 200, response.text
+                return response
+
+            def get(path: str, **kwargs):
+                response = client.get(path, **kwargs)
+                assert response.status_code == 200, response.text
+                return response
+
+            yield Case(
+                "routes.deposit",
+                params,
+                "tx",
+                args.txs,
+                lambda: post("/deposit", json=payload),
+            )
+            yield Case(
+                "routes.deposit_stream",
+                params,
+                "tx",
+                args.txs,
+                lambda: post(
+                    "/deposit/stream",
+                    content=body,
+                    headers={"content-type": "application/octet-stream"},
+                ),
+            )
+            yield Case(
+                "routes.users",
+                {"limit": 100},
+                "request",
+                1,
+                lambda: get("/users", params={"offset": 0, "limit": 100}),
+            )
+            yield Case(
+                "routes.withdraw_count",
+                {},
+                "request",
+                1,
+                lambda: get("/withdraw/count", params={"chain": "SEP"}),
+            )
+            yield Case(
+                "routes.withdraws",
+                {"limit": 100},
+                "request",
+                1,
+                lambda: get("/withdraws", params={"chain": "SEP", "limit": 100}),
+            )
+            yield Case(
+                "routes.withdraw_ids",
+                {"ids": 100},
+                "request",
+                1,
+                lambda: post(
+                    "/withdraw/id", params={"chain": "SEP"}, json=list(range(100))
+                ),
+            )
+
+
+def measure(case: Case, repeat: int) -> dict:
+    timer = timeit.Timer(case.func)
+    # routes print the deposits they process
+    with contextlib.redirect_stdout(io.StringIO()):
+        number, _ = timer.autorange()
+        times = timer.repeat(repeat, number)
+    per_item = [seconds / number / case.items * 1e6 for seconds in times]
+    return {
+        "name": case.name,
+        "params": case.params,
+        "unit": f"us/{case.unit}",
+        "number": number,
+        "repeat": repeat,
+        "min": min(per_item),
+        "median": statistics.median(per_item),
+        "mean": statistics.fmean(per_item),
+        "stdev": statistics.stdev(per_item) if repeat > 1 else 0.0,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result: dict) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> bool:
+    """Print median ratios against a baseline, False if any is over threshold."""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"] if "median" in r}
+    ok = True
+    print(f"\ncompared with {baseline_path}")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None or "median" not in result:
+            continue
+        ratio = result["median"] / old["median"]
+        slower = ratio > threshold
+        ok = ok and not slower
+        flag = "  SLOWER" if slower else ""
+        print(f"  {result_key(result):<64} {ratio:6.2f}x{flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--deposits", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--txs", type=int, default=64, help="txs per batch call")
+    parser.add_argument("--salts", type=int, default=1000, help="salts per bulk call")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=list(GROUPS))
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    signer = DepositTxSigner(args.seed)
+    # before any deposit pool is forked, so its workers accept the txs
+    signer.install()
+
+    results = []
+    for name in args.only or GROUPS:
+        cases = GROUPS[name](args, signer)
+        try:
+            for case in cases:
+                result = measure(case, args.repeat)
+                results.append(result)
+                params = " ".join(f"{k}={v}" for k, v in case.params.items())
+                print(
+                    f"{case.name:<40} {params:<20}"
+                    f" {result['median']:12.2f} {result['unit']}"
+                )
+        except ImportError as e:
+            # e.g. frost_lib for the Aptos addresses and the routes
+            results.append({"name": name, "skipped": str(e)})
+            print(f"{name:<40} skipped: {e}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import DEPOSIT_STAGE_SECONDS
+from parse_deposit import DepositTransaction
+from verify_deposit import verify_deposit_txs
+
+DEPOSIT_WORKERS = int(os.environ.get("DEPOSIT_WORKERS", os.cpu_count() or 1))
+DEPOSIT_CHUNK_SIZE = int(os.environ.get("DEPOSIT_CHUNK_SIZE", 32))
+DEPOSIT_MAX_IN_FLIGHT = int(
+    os.environ.get("DEPOSIT_MAX_IN_FLIGHT", 2 * DEPOSIT_WORKERS)
+)
+
+
+def verify_and_parse(
+    txs: list[bytes], timings: dict[str, list[float]] | None = None
+) -> list[DepositTransaction | None]:
+    """Verify and parse a chunk of deposit txs, None for rejected ones."""
+    parsed: list[DepositTransaction | None] = []
+    for tx, verified in zip(txs, verify_deposit_txs(txs, timings)):
+        if not verified:
+            parsed.append(None)
+            continue
+        start = time.perf_counter()
+        try:
+            parsed.append(DepositTransaction.from_tx(tx))
+        except ValueError as e:
+            print(f"Deposit tx parsing failed: {e}")
+            parsed.append(None)
+        if timings is not None:
+            timings["parse"].append(time.perf_counter() - start)
+    return parsed
+
+
+def _verify_and_parse_timed(
+    txs: list[bytes],
+) -> tuple[list[DepositTransaction | None], dict[str, list[float]]]:
+    # timed in the worker, the parent records them in its metrics
+    timings = {"verify_frost": [], "verify_ecdsa": [], "parse": []}
+    return verify_and_parse(txs, timings), timings
+
+
+class DepositPool:
+    """Runs the CPU-bound verify + parse pipeline off the event loop.
+
+    Batches are split into chunks that are fanned out over a process pool.
+    At most `max_in_flight` chunks are submitted at once and results are
+    returned in the order of the input txs.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEPOSIT_WORKERS,
+        chunk_size: int = DEPOSIT_CHUNK_SIZE,
+        max_in_flight: int = DEPOSIT_MAX_IN_FLIGHT,
+    ):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(
+        self, txs: list[bytes], chain: str
+    ) -> list[DepositTransaction | None]:
+        start = time.perf_counter()
+        async with self._in_flight:
+            loop = asyncio.get_running_loop()
+            parsed, timings = await loop.run_in_executor(
+                self.executor, _verify_and_parse_timed, txs
+            )
+        DEPOSIT_STAGE_SECONDS.observe(time.perf_counter() - start, chain, "pool")
+        for stage, seconds in timings.items():
+            for value in seconds:
+                DEPOSIT_STAGE_SECONDS.observe(value, chain, stage)
+        return parsed
+
+    async def process(
+        self, txs: list[bytes], chain: str = ""
+    ) -> list[DepositTransaction | None]:
+        """Verify and parse `txs`, stage timings are recorded under `chain`."""
+        chunks = [
+            txs[i : i + self.chunk_size] for i in range(0, len(txs), self.chunk_size)
+        ]
+        results = await asyncio.gather(*(self._run(chunk, chain) for chunk in chunks))
+        return [parsed for chunk in results for parsed in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
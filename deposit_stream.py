@@ -0,0 +1,96 @@
+import json
+import os
+from base64 import b64decode
+from collections.abc import AsyncIterator
+
+# bytes a single deposit tx in a stream may have
+DEPOSIT_STREAM_MAX_TX = int(os.environ.get("DEPOSIT_STREAM_MAX_TX", 1 << 20))
+
+LENGTH_PREFIX = 4
+OCTET_STREAM = "application/octet-stream"
+NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_length_prefixed(
+    chunks: AsyncIterator[bytes], max_size: int = DEPOSIT_STREAM_MAX_TX
+) -> AsyncIterator[list[bytes]]:
+    """Txs of a body where each tx follows its 4-byte big-endian length.
+
+    Yields the txs completed by each chunk of the body as soon as it is
+    received, raises ValueError on an oversized or truncated tx.
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        txs = []
+        start = 0
+        while len(buffer) - start >= LENGTH_PREFIX:
+            size = int.from_bytes(buffer[start : start + LENGTH_PREFIX], "big")
+            if size > max_size:
+                raise ValueError(f"deposit tx of {size} bytes is over {max_size}")
+            end = start + LENGTH_PREFIX + size
+            if len(buffer) < end:
+                break
+            txs.append(bytes(buffer[start + LENGTH_PREFIX : end]))
+            start = end
+        del buffer[:start]
+        if txs:
+            yield txs
+    if buffer:
+        raise ValueError("body ends in the middle of a deposit tx")
+
+
+def _decode_line(line: bytes, max_size: int) -> bytes:
+    # base64 of max_size bytes in quotes
+    max_line = (max_size + 2) // 3 * 4 + 2
+    if len(line) > max_line:
+        raise ValueError(f"deposit tx line is over {max_line} bytes")
+    # a bare base64 line or a JSON string of it
+    if line.startswith(b'"'):
+        line = json.loads(line).encode("ascii")
+    tx = b64decode(line, validate=True)
+    if len(tx) > max_size:
+        raise ValueError(f"deposit tx of {len(tx)} bytes is over {max_size}")
+    return tx
+
+
+async def iter_ndjson_base64(
+    chunks: AsyncIterator[bytes], max_size: int = DEPOSIT_STREAM_MAX_TX
+) -> AsyncIterator[list[bytes]]:
+    """Txs of a body with one base64 encoded tx per line.
+
+    Yields the txs completed by each chunk of the body as soon as it is
+    received, raises ValueError on an oversized or malformed line.
+    """
+    # base64 of max_size bytes in quotes
+    max_line = (max_size + 2) // 3 * 4 + 2
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        txs = []
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line = bytes(buffer[start:end]).strip()
+            start = end + 1
+            if line:
+                txs.append(_decode_line(line, max_size))
+        del buffer[:start]
+        if len(buffer) > max_line:
+            raise ValueError(f"deposit tx line is over {max_line} bytes")
+        if txs:
+            yield txs
+    line = bytes(buffer).strip()
+    if line:
+        yield [_decode_line(line, max_size)]
+
+
+def iter_deposit_txs(
+    content_type: str | None, chunks: AsyncIterator[bytes]
+) -> AsyncIterator[list[bytes]]:
+    """The parser for a body of `content_type`, ValueError if there is none."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == OCTET_STREAM:
+        return iter_length_prefixed(chunks)
+    if media_type in NDJSON:
+        return iter_ndjson_base64(chunks)
+    raise ValueError(f"expected {OCTET_STREAM} or {NDJSON[0]}, got {content_type}")
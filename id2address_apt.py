@@ -1,26 +1,46 @@
-from aptos_sdk import ed25519
-from aptos_sdk.account_address import AccountAddress
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from functools import cache, lru_cache
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from zexfrost.custom_types import PublicKeyPackage
 
-from zexfrost.custom_types import PublicKeyPackage
+# aptos_sdk, frost_lib and zexfrost are imported on the first derivation
 
+APT_VERIFYING_KEY = {
+    "header": {"version": 0, "ciphersuite": "FROST-ED25519-SHA512-v1"},
+    "verifying_shares": {
+        "0000000000000000000000000000000000000000000000000000000000000001": "f71b6a3d148db6d6c8dcda46d25620ea029959b7321d93de381c89b9ead0eb4d",
+        "0000000000000000000000000000000000000000000000000000000000000002": "69b02cb070decdf156243d772e4f72cffcb3341caa796893e4229152af48a6d1",
+        "0000000000000000000000000000000000000000000000000000000000000003": "c6768aaffc14e9486ce8712da724ee0873e185d6c9d70311d9af4adbde9dc139",
+    },
+    "verifying_key": "0243320c99839580a4b1aff327be6d512df8fbc522b7e8ee21d620b3641fb147",
+}
 
-verifying_key = PublicKeyPackage.model_validate(
-    {
-        "header": {"version": 0, "ciphersuite": "FROST-ED25519-SHA512-v1"},
-        "verifying_shares": {
-            "0000000000000000000000000000000000000000000000000000000000000001": "f71b6a3d148db6d6c8dcda46d25620ea029959b7321d93de381c89b9ead0eb4d",
-            "0000000000000000000000000000000000000000000000000000000000000002": "69b02cb070decdf156243d772e4f72cffcb3341caa796893e4229152af48a6d1",
-            "0000000000000000000000000000000000000000000000000000000000000003": "c6768aaffc14e9486ce8712da724ee0873e185d6c9d70311d9af4adbde9dc139",
-        },
-        "verifying_key": "0243320c99839580a4b1aff327be6d512df8fbc522b7e8ee21d620b3641fb147",
-    }
-)
+
+@cache
+def group_key() -> "PublicKeyPackage":
+    """The key package addresses are derived from, validated on first use.
+
+    Only the group verifying key is needed for an address, so tweak a
+    package without the verifying shares instead of tweaking every share
+    as well.
+    """
+    from zexfrost.custom_types import PublicKeyPackage
+
+    verifying_key = PublicKeyPackage.model_validate(APT_VERIFYING_KEY)
+    return verifying_key.model_copy(update={"verifying_shares": {}})
+
+
+APT_ADDRESS_CACHE_SIZE = int(os.environ.get("APT_ADDRESS_CACHE_SIZE", 100_000))
+APT_ADDRESS_CHUNK_SIZE = int(os.environ.get("APT_ADDRESS_CHUNK_SIZE", 64))
 
 
 def compute_apt_tweaked_pubkey(
-    pubkey_package: PublicKeyPackage, salt: str
-) -> PublicKeyPackage:
+    pubkey_package: "PublicKeyPackage", salt: str
+) -> "PublicKeyPackage":
     assert salt.startswith("0x"), "salt should be a hexstr"
     tweak_by = bytes.fromhex(salt[2:])
     from frost_lib import ed25519 as frost
@@ -31,12 +51,50 @@ def compute_apt_tweaked_pubkey(
 
 def compute_apt_address(salt: str) -> str:
     """Compute Aptos address from public key package and salt."""
-    sender = compute_apt_tweaked_pubkey(verifying_key, salt)
+    return _compute_apt_address(salt.lower())
+
+
+@lru_cache(maxsize=APT_ADDRESS_CACHE_SIZE)
+def _compute_apt_address(salt: str) -> str:
+    from aptos_sdk import ed25519
+    from aptos_sdk.account_address import AccountAddress
+
+    sender = compute_apt_tweaked_pubkey(group_key(), salt)
     sender_pub = ed25519.PublicKey.from_str(sender.verifying_key)
     tweaked_address = AccountAddress.from_key(sender_pub)
     return str(tweaked_address)
 
 
+def try_compute_apt_addresses(
+    salts: list[str],
+) -> list[tuple[str, str | None, str | None]]:
+    """Compute (salt, address, error) for each salt without failing the batch."""
+    results = []
+    for salt in salts:
+        try:
+            results.append((salt, compute_apt_address(salt), None))
+        except Exception as e:
+            results.append((salt, None, str(e) or type(e).__name__))
+    return results
+
+
+async def iter_apt_addresses(
+    salts: list[str], chunk_size: int = APT_ADDRESS_CHUNK_SIZE
+) -> AsyncIterator[list[tuple[str, str | None, str | None]]]:
+    """Derive addresses in worker threads, yielding chunks as they complete."""
+    chunks = [salts[i : i + chunk_size] for i in range(0, len(salts), chunk_size)]
+    tasks = [
+        asyncio.ensure_future(asyncio.to_thread(try_compute_apt_addresses, chunk))
+        for chunk in chunks
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 if __name__ == "__main__":
     address = compute_apt_address("0x")
     print(address)
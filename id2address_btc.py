@@ -1,6 +1,15 @@
 import hashlib
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from operator import xor
 
+import secp256k1
+from bitcoinutils.bech32 import BECH32M_CONST, CHARSET, bech32_hrp_expand
+from bitcoinutils.constants import NETWORK_SEGWIT_PREFIXES
 from bitcoinutils.keys import PublicKey
+from bitcoinutils.setup import get_network
 from bitcoinutils.utils import tweak_taproot_pubkey
 from utils import compute_tweak_by, encode_salt
 
@@ -31,10 +40,103 @@ def tagged_hash(data: bytes, tag: str) -> bytes:
     return hashlib.sha256(tag_digest + tag_digest + data).digest()
 
 
+# sha256 state after absorbing the TapTweak tag prefix
+TAP_TWEAK = hashlib.sha256(2 * hashlib.sha256(b"TapTweak").digest())
+
+
+def tweak_x_only(key_x: bytes, tweak_state) -> bytes:
+    """Return the x coordinate of lift_x(key_x) + tagged_hash(...)*G.
+
+    `tweak_state` is a TapTweak midstate that already absorbed key_x and
+    anything else the tweak commits to.
+    """
+    point = secp256k1.PublicKey(b"\x02" + key_x, raw=True)
+    return point.tweak_add(tweak_state.digest()).serialize()[1:]
+
+
+BECH32_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+# xor of the generator terms selected by each possible top 5 bits
+BECH32_TABLE = tuple(
+    reduce(xor, (g for i, g in enumerate(BECH32_GENERATOR) if top >> i & 1), 0)
+    for top in range(32)
+)
+
+
+def bech32_polymod(values: Iterable[int], chk: int = 1) -> int:
+    """bitcoinutils.bech32.bech32_polymod that can resume from a prior `chk`."""
+    for value in values:
+        chk = (chk & 0x1FFFFFF) << 5 ^ value ^ BECH32_TABLE[chk >> 25]
+    return chk
+
+
+def encode_p2tr(hrp: str, hrp_chk: int, output_x: bytes) -> str:
+    """Bech32m encode a v1 witness program, `hrp_chk` is the polymod of hrp."""
+    # 256 bits padded to 52 groups of 5 bits
+    n = int.from_bytes(output_x, "big") << 4
+    data = [1] + [(n >> shift) & 31 for shift in range(255, -1, -5)]
+    polymod = bech32_polymod(data + [0] * 6, hrp_chk) ^ BECH32M_CONST
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join([CHARSET[d] for d in data + checksum])
+
+
+def iter_taproot_addresses(
+    master_public: PublicKey, salts: Iterable[int], hrp: str | None = None
+) -> Iterator[tuple[int, str]]:
+    """Yield (salt, address) pairs, same addresses as get_taproot_address."""
+    hrp = hrp or NETWORK_SEGWIT_PREFIXES[get_network()]
+    hrp_chk = bech32_polymod(bech32_hrp_expand(hrp))
+    master_x = master_public.to_bytes()[:32]
+    master_state = TAP_TWEAK.copy()
+    master_state.update(master_x)
+
+    for salt in salts:
+        tweak_state = master_state.copy()
+        tweak_state.update(compute_tweak_by(encode_salt(salt)))
+        internal_x = tweak_x_only(master_x, tweak_state)
+
+        # key path only taproot output, see PublicKey.get_taproot_address
+        tweak_state = TAP_TWEAK.copy()
+        tweak_state.update(internal_x)
+        output_x = tweak_x_only(internal_x, tweak_state)
+
+        yield salt, encode_p2tr(hrp, hrp_chk, output_x)
+
+
+def _taproot_chunk(master_hex: str, salts: range, hrp: str) -> list[tuple[int, str]]:
+    return list(iter_taproot_addresses(PublicKey(master_hex), salts, hrp))
+
+
+def bulk_taproot_addresses(
+    master_public: PublicKey,
+    salts: range,
+    workers: int | None = None,
+    chunk_size: int = 20_000,
+) -> Iterator[tuple[int, str]]:
+    """Derive the addresses for a range of salts on all cores, in salt order."""
+    hrp = NETWORK_SEGWIT_PREFIXES[get_network()]
+    workers = workers or os.cpu_count() or 1
+    chunks = [salts[i : i + chunk_size] for i in range(0, len(salts), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        yield from iter_taproot_addresses(master_public, salts, hrp)
+        return
+
+    master_hex = master_public.to_hex()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _taproot_chunk,
+            [master_hex] * len(chunks),
+            chunks,
+            [hrp] * len(chunks),
+        )
+        for pairs in results:
+            yield from pairs
+
+
 taproot_verifying_key = PublicKey(
     "0367e79f1483c900ff4eb46cdf31f263c4b34be7594e52d4f2a84ef7328324c556"
 )
 
-for salt in (1, 123456789, 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061):
-    taproot_address = get_taproot_address(taproot_verifying_key, salt)
-    print(f"salt: {salt}, btc address: {taproot_address}")
+if __name__ == "__main__":
+    for salt in (1, 123456789, 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061):
+        taproot_address = get_taproot_address(taproot_verifying_key, salt)
+        print(f"salt: {salt}, btc address: {taproot_address}")
@@ -1,3 +1,8 @@
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_hash.auto import keccak as keccak256
 from eth_typing.encoding import HexStr
 from eth_utils.address import to_checksum_address
 from eth_utils.crypto import keccak
@@ -19,10 +24,67 @@ def get_create2_address(
     return to_checksum_address(address_bytes)
 
 
-factory_address = "0x06bcEa7a0cf5AA9A28cB3c6C8e799Ac4D44024e3"
-byte_code_hash = "0x2da6a0b42d3d9a39b48fa6b598ed1e3db10547faf2922de05a9953ef7de23de6"
+def iter_create2_addresses(
+    factory_address: str,
+    salts: Iterable[int],
+    bytecode_hash: str,
+    checksum: bool = False,
+) -> Iterator[tuple[int, str]]:
+    """Yield (salt, address) pairs, lowercase unless `checksum` is set."""
+    prefix = b"\xff" + Web3.to_bytes(hexstr=HexStr(factory_address))
+    suffix = Web3.to_bytes(hexstr=HexStr(bytecode_hash))
+
+    for salt in salts:
+        tweak_by = compute_tweak_by(encode_salt(salt))
+        address_bytes = keccak256(prefix + tweak_by + suffix)[12:]
+        if checksum:
+            yield salt, to_checksum_address(address_bytes)
+        else:
+            yield salt, "0x" + address_bytes.hex()
+
+
+def _create2_chunk(
+    factory_address: str, salts: range, bytecode_hash: str, checksum: bool
+) -> list[tuple[int, str]]:
+    return list(iter_create2_addresses(factory_address, salts, bytecode_hash, checksum))
+
+
+def bulk_create2_addresses(
+    factory_address: str,
+    salts: range,
+    bytecode_hash: str,
+    checksum: bool = False,
+    workers: int | None = None,
+    chunk_size: int = 50_000,
+) -> Iterator[tuple[int, str]]:
+    """Derive the addresses for a range of salts on all cores, in salt order."""
+    workers = workers or os.cpu_count() or 1
+    chunks = [salts[i : i + chunk_size] for i in range(0, len(salts), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        yield from iter_create2_addresses(
+            factory_address, salts, bytecode_hash, checksum
+        )
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _create2_chunk,
+            [factory_address] * len(chunks),
+            chunks,
+            [bytecode_hash] * len(chunks),
+            [checksum] * len(chunks),
+        )
+        for pairs in results:
+            yield from pairs
+
+
+if __name__ == "__main__":
+    factory_address = "0x06bcEa7a0cf5AA9A28cB3c6C8e799Ac4D44024e3"
+    byte_code_hash = (
+        "0x2da6a0b42d3d9a39b48fa6b598ed1e3db10547faf2922de05a9953ef7de23de6"
+    )
 
-for user_id in range(0, 100):
-    salt = user_id + 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + 1000
-    evm_address = get_create2_address(factory_address, salt, byte_code_hash)
-    print(f"user id: {user_id}, salt: {salt}, evm address: {evm_address}")
+    for user_id in range(0, 100):
+        salt = user_id + 0x5FCEB18CF62BF791D7AA0931D3159F95650A0061 + 1000
+        evm_address = get_create2_address(factory_address, salt, byte_code_hash)
+        print(f"user id: {user_id}, salt: {salt}, evm address: {evm_address}")
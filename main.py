@@ -1,16 +1,22 @@
+import asyncio
 import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-from fastapi import APIRouter, FastAPI, Query, HTTPException
+from fastapi import APIRouter, FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from parse_deposit import DepositTransaction
-from verify_deposit import verify_deposit_tx
-from id2address_apt import compute_apt_address
+from deposit_pool import DepositPool
+from deposit_stream import iter_deposit_txs
+from id2address_apt import iter_apt_addresses
+from withdraw_store import WithdrawStore
 
 NUMBER_OF_USERS = 100
 
 router = APIRouter()
+deposit_pool = DepositPool()
 
 
 @router.get("/user/count")
@@ -37,21 +43,55 @@ def get_users(
     ]
 
 
+async def process_deposit_txs(deposit_txs: list[bytes]) -> None:
+    for parsed_tx in await deposit_pool.process(deposit_txs):
+        if parsed_tx is None:
+            continue
+        for deposit in parsed_tx.deposits:
+            ##############################
+            #  process deposit txs here  #
+            ##############################
+            print(deposit)
+
+
 @router.post("/deposit")
 async def deposit(deposit_txs: list[str]) -> dict[str, bool]:
-    deposit_txs = [tx.encode("latin-1") for tx in deposit_txs]
-    for tx in deposit_txs:
-        if verify_deposit_tx(tx):
-            parsed_tx = DepositTransaction.from_tx(tx)
-            for deposit in parsed_tx.deposits:
-                ##############################
-                #  process deposit txs here  #
-                ##############################
-                print(deposit)
+    await process_deposit_txs([tx.encode("latin-1") for tx in deposit_txs])
+    return {"success": True}
+
 
+@router.post("/deposit/stream")
+async def deposit_stream(request: Request) -> dict[str, bool]:
+    """Same as /deposit, with the raw txs read from the body as it arrives.
+
+    The body is either application/octet-stream, each tx after its 4-byte
+    big-endian length, or application/x-ndjson with a base64 tx per line.
+    """
+    try:
+        batches = iter_deposit_txs(
+            request.headers.get("content-type"), request.stream()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    # txs are verified while the rest of the body is still being received
+    tasks = []
+    try:
+        async for deposit_txs in batches:
+            tasks.append(asyncio.create_task(process_deposit_txs(deposit_txs)))
+    except BaseException as e:
+        # the txs before the error still finish, their failures must not
+        # replace it
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+
+    await asyncio.gather(*tasks)
     return {"success": True}
 
 
+# sample withdrawals, added to withdraw_store on start
 WITHDRAWALS = [
     {
         "chain": "SEP",
@@ -73,15 +113,20 @@ WITHDRAWALS = [
     },
 ]
 
-WITHDRAWALS_MAP = {withdrawal["id"]: withdrawal for withdrawal in WITHDRAWALS}
+# chains served by /withdraw/count and /withdraws
+WITHDRAW_CHAINS = {"SEP"}
+# ids one /withdraw/id call may ask for
+MAX_WITHDRAW_IDS = 10_000
+
+withdraw_store = WithdrawStore()
 
 
 @router.get("/withdraw/count")
 def get_withdraw_count(chain: str = Query(...)) -> dict[str, int | str]:
-    if chain != "SEP":
+    if chain not in WITHDRAW_CHAINS:
         raise HTTPException(status_code=400, detail="Invalid chain.")
 
-    return {"chain": chain, "count": len(WITHDRAWALS)}
+    return {"chain": chain, "count": withdraw_store.count(chain)}
 
 
 class Withdraw(BaseModel):
@@ -100,10 +145,10 @@ def get_withdraws(
     offset: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
 ):
-    if chain != "SEP":
+    if chain not in WITHDRAW_CHAINS:
         raise HTTPException(status_code=400, detail="Invalid chain.")
 
-    return WITHDRAWALS
+    return withdraw_store.page(chain, offset, limit)
 
 
 @router.get("/withdraw/id", response_model=list[Withdraw])
@@ -111,7 +156,7 @@ def get_withdraw_by_ids(
     chain: str = Query(...),
     ids: str = Query(..., description="JSON.dumps of list of ids"),
 ):
-    if chain != "SEP":
+    if chain not in WITHDRAW_CHAINS:
         raise HTTPException(status_code=400, detail="Invalid chain.")
 
     try:
@@ -120,15 +165,25 @@ def get_withdraw_by_ids(
             isinstance(i, int) for i in id_list
         ):
             raise ValueError("ids must be a JSON list of integers.")
+        if len(id_list) > MAX_WITHDRAW_IDS:
+            raise ValueError(f"at most {MAX_WITHDRAW_IDS} ids are allowed.")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid ids format: {e}")
 
-    withdrawals = []
-    for wid in id_list:
-        if wid in WITHDRAWALS_MAP:
-            withdrawals.append(WITHDRAWALS_MAP[wid])
+    return withdraw_store.get_many(chain, id_list)
 
-    return withdrawals
+
+@router.post("/withdraw/id", response_model=list[Withdraw])
+def post_withdraw_by_ids(ids: list[int], chain: str = Query(...)):
+    """Same as GET /withdraw/id with the ids as the JSON body, for long lists."""
+    if chain not in WITHDRAW_CHAINS:
+        raise HTTPException(status_code=400, detail="Invalid chain.")
+    if len(ids) > MAX_WITHDRAW_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_WITHDRAW_IDS} ids are allowed."
+        )
+
+    return withdraw_store.get_many(chain, ids)
 
 
 class AddressMapping(BaseModel):
@@ -138,26 +193,60 @@ class AddressMapping(BaseModel):
 
 class AddressesResponse(BaseModel):
     addresses: dict[str, AddressMapping]
+    errors: dict[str, str] = {}
 
 
 @router.post("/deposit/addresses", response_model=AddressesResponse)
-def convert_eth_to_aptos(eth_addresses: list[str]):
+async def convert_eth_to_aptos(eth_addresses: list[str]):
+    if not eth_addresses:
+        raise HTTPException(status_code=400, detail="No Ethereum addresses provided.")
+
+    derived: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    async for chunk in iter_apt_addresses(eth_addresses):
+        for addr, apt_addr, error in chunk:
+            if error is None:
+                derived[addr] = apt_addr
+            else:
+                errors[addr] = f"Conversion error: {error}"
+
+    result = {
+        addr: AddressMapping(apt=derived[addr])
+        for addr in eth_addresses
+        if addr in derived
+    }
+    return AddressesResponse(addresses=result, errors=errors)
+
+
+async def iter_address_lines(eth_addresses: list[str]) -> AsyncIterator[str]:
+    async for chunk in iter_apt_addresses(eth_addresses):
+        for addr, apt_addr, error in chunk:
+            if error is None:
+                yield json.dumps({"eth": addr, "apt": apt_addr}) + "\n"
+            else:
+                yield json.dumps({"eth": addr, "error": error}) + "\n"
+
+
+@router.post("/deposit/addresses/stream")
+async def stream_eth_to_aptos(eth_addresses: list[str]):
+    """Same as /deposit/addresses, one NDJSON line per address as it is ready."""
     if not eth_addresses:
         raise HTTPException(status_code=400, detail="No Ethereum addresses provided.")
 
-    result: dict[str, AddressMapping] = {}
+    return StreamingResponse(
+        iter_address_lines(eth_addresses), media_type="application/x-ndjson"
+    )
 
-    try:
-        for addr in eth_addresses:
-            apt_addr = compute_apt_address(addr)
-            result[addr] = AddressMapping(apt=apt_addr)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Conversion error: {e}")
 
-    return AddressesResponse(addresses=result)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    withdraw_store.init()
+    withdraw_store.add(WITHDRAWALS)
+    yield
+    deposit_pool.shutdown()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # allow all origins (dev only)
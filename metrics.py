@@ -0,0 +1,257 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+# seconds between stack samples of the profiler, 0 leaves it off
+METRICS_PROFILE_INTERVAL = float(os.environ.get("METRICS_PROFILE_INTERVAL", 0))
+PROFILE_MAX_DEPTH = 64
+PROFILE_MAX_STACKS = 10_000
+
+# upper bounds in seconds, from a signature check to waiting for a receipt
+BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        # the text format names the family like its samples, as
+        # prometheus_client does
+        name = f"{self.name}_total"
+        yield f"# HELP {name} {self.help}"
+        yield f"# TYPE {name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{name}{_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    """Observations counted into BUCKETS, cumulated only when rendered."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [count per bucket and one for +Inf, sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._values.items()
+            ]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = _labels(self.labels, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Gauge:
+    """Values read by `collect` when rendered, as {label values: value}."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...],
+        collect: Callable[[], dict[tuple, float]],
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.collect().items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # e.g. a gauge whose DB is busy, the others are still served
+                print(f"Collecting {metric.name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+DEPOSIT_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "deposit_stage_seconds",
+        "Seconds per call of each deposit pipeline stage.",
+        ("chain", "stage"),
+    )
+)
+DEPOSIT_TXS = REGISTRY.register(
+    Counter(
+        "deposit_txs",
+        "Deposit txs by outcome: verified, rejected or ignored.",
+        ("chain", "result"),
+    )
+)
+RPC_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "rpc_request_seconds",
+        "Seconds per JSON-RPC request by method.",
+        ("chain", "method"),
+    )
+)
+RPC_ERRORS = REGISTRY.register(
+    Counter(
+        "rpc_errors", "JSON-RPC requests that raised, by method.", ("chain", "method")
+    )
+)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads every `interval` seconds.
+
+    Stacks are counted in the collapsed format flamegraph.pl and
+    speedscope read, one "thread;outer;...;inner count" per line.
+    """
+
+    def __init__(self, interval: float = METRICS_PROFILE_INTERVAL):
+        self.interval = interval
+        self._stacks: Tally[str] = Tally()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            samples = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    filename = os.path.basename(code.co_filename)
+                    stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                samples.append(";".join(reversed(stack)))
+            with self._lock:
+                for stack in samples:
+                    if stack in self._stacks or len(self._stacks) < PROFILE_MAX_STACKS:
+                        self._stacks[stack] += 1
+
+    def collapsed(self, reset: bool = False) -> str:
+        with self._lock:
+            stacks = self._stacks.copy()
+            if reset:
+                self._stacks.clear()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+profiler = SamplingProfiler()
@@ -1,8 +1,19 @@
 from decimal import Decimal
-from struct import calcsize, unpack
+from functools import lru_cache
+from struct import Struct
 
 from pydantic import BaseModel
 
+HEADER = Struct(">B B 3s B B H")
+
+# 10 ** decimal for every value the one-byte decimal field can hold
+SCALES = tuple(Decimal(10) ** i for i in range(256))
+
+
+@lru_cache(maxsize=None)
+def deposit_prefix(tx_hash_len: int, token_contract_len: int) -> Struct:
+    return Struct(f">{tx_hash_len}s {token_contract_len}s 32s B I")
+
 
 class Deposit(BaseModel):
     tx_hash: str
@@ -23,73 +34,145 @@ class DepositTransaction(BaseModel):
 
     @classmethod
     def from_tx(cls, tx: bytes) -> "DepositTransaction":
-        header_format = ">B B 3s B B H"
-        header_size = calcsize(header_format)
-        if len(tx) < header_size:
-            raise ValueError("tx too short for header")
-
-        version, operation, chain_bytes, tx_hash_len, token_contract_len, count = (
-            unpack(header_format, tx[:header_size])
+        return parse_deposit_tx(tx).to_model()
+
+
+class RawDeposit:
+    """Deposit as read from the tx, converted to a `Deposit` on demand."""
+
+    __slots__ = (
+        "tx_hash",
+        "chain",
+        "token_contract",
+        "amount_int",
+        "decimal",
+        "time",
+        "salt",
+        "vout",
+    )
+
+    def __init__(
+        self,
+        tx_hash: bytes,
+        chain: str,
+        token_contract: bytes,
+        amount_int: int,
+        decimal: int,
+        time: int,
+        salt: bytes,
+        vout: int,
+    ):
+        self.tx_hash = tx_hash
+        self.chain = chain
+        self.token_contract = token_contract
+        self.amount_int = amount_int
+        self.decimal = decimal
+        self.time = time
+        self.salt = salt
+        self.vout = vout
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(self.amount_int) / SCALES[self.decimal]
+
+    def to_dict(self) -> dict:
+        return {
+            "tx_hash": self.tx_hash.hex(),
+            "chain": self.chain,
+            "token_contract": "0x" + self.token_contract.hex(),
+            "amount": self.amount,
+            "decimal": self.decimal,
+            "time": self.time,
+            "salt": self.salt.hex(),
+            "vout": self.vout,
+        }
+
+    def to_model(self) -> Deposit:
+        return Deposit.model_validate(self.to_dict())
+
+
+class RawDepositTransaction:
+    __slots__ = ("version", "operation", "chain", "deposits")
+
+    def __init__(
+        self, version: int, operation: str, chain: str, deposits: list[RawDeposit]
+    ):
+        self.version = version
+        self.operation = operation
+        self.chain = chain
+        self.deposits = deposits
+
+    def to_model(self) -> DepositTransaction:
+        # validate the whole tree in a single call
+        return DepositTransaction.model_validate(
+            {
+                "version": self.version,
+                "operation": self.operation,
+                "chain": self.chain,
+                "deposits": [deposit.to_dict() for deposit in self.deposits],
+            }
         )
-        chain = chain_bytes.upper().decode()
 
-        prefix_fmt = f">{tx_hash_len}s {token_contract_len}s 32s B I"
-        prefix_size = calcsize(prefix_fmt)
 
-        offset = header_size
-        deposits: list[Deposit] = []
+def parse_deposit_tx(tx: bytes) -> RawDepositTransaction:
+    """Parse a deposit tx without copying it or building Pydantic models."""
+    view = memoryview(tx)
+    size = len(view)
+    if size < HEADER.size:
+        raise ValueError("tx too short for header")
 
-        for _ in range(count):
-            # fixed prefix
-            if offset + prefix_size > len(tx):
-                raise ValueError("tx too short for deposit prefix")
-            tx_hash, token_contract, amount_bytes, decimal, t = unpack(
-                prefix_fmt, tx[offset : offset + prefix_size]
-            )
-            offset += prefix_size
-
-            # salt_len
-            if offset + 1 > len(tx):
-                raise ValueError("tx too short for salt_len")
-            salt_len = tx[offset]
-            offset += 1
-
-            # salt (big-endian, variable length)
-            if offset + salt_len > len(tx):
-                raise ValueError("tx too short for salt bytes")
-            salt_bytes = tx[offset : offset + salt_len]
-            offset += salt_len
-            salt = salt_bytes.hex()
-
-            # vout
-            if offset + 1 > len(tx):
-                raise ValueError("tx too short for vout")
-            vout = tx[offset]
-            offset += 1
-
-            # amount -> Decimal with scaling by decimal places
-            amount_int = int.from_bytes(amount_bytes, "big")
-            amount = Decimal(amount_int) / (Decimal(10) ** Decimal(decimal))
-
-            deposits.append(
-                Deposit(
-                    tx_hash=tx_hash.hex(),
-                    chain=chain,
-                    token_contract="0x" + token_contract.hex(),
-                    amount=amount,
-                    decimal=decimal,
-                    time=t,
-                    salt=salt,
-                    vout=vout,
-                )
-            )
+    version, operation, chain_bytes, tx_hash_len, token_contract_len, count = (
+        HEADER.unpack_from(view)
+    )
+    chain = chain_bytes.upper().decode()
+
+    prefix = deposit_prefix(tx_hash_len, token_contract_len)
+    prefix_size = prefix.size
+
+    offset = HEADER.size
+    deposits: list[RawDeposit] = []
 
-        return DepositTransaction(
-            version=version,
-            operation=chr(operation),
-            chain=chain,
-            deposits=deposits,
+    for _ in range(count):
+        # fixed prefix
+        if offset + prefix_size > size:
+            raise ValueError("tx too short for deposit prefix")
+        tx_hash, token_contract, amount_bytes, decimal, t = prefix.unpack_from(
+            view, offset
         )
+        offset += prefix_size
+
+        # salt_len
+        if offset + 1 > size:
+            raise ValueError("tx too short for salt_len")
+        salt_len = view[offset]
+        offset += 1
+
+        # salt (big-endian, variable length)
+        if offset + salt_len > size:
+            raise ValueError("tx too short for salt bytes")
+        salt = view[offset : offset + salt_len].tobytes()
+        offset += salt_len
+
+        # vout
+        if offset + 1 > size:
+            raise ValueError("tx too short for vout")
+        vout = view[offset]
+        offset += 1
+
+        deposits.append(
+            RawDeposit(
+                tx_hash,
+                chain,
+                token_contract,
+                int.from_bytes(amount_bytes, "big"),
+                decimal,
+                t,
+                salt,
+                vout,
+            )
+        )
+
+    return RawDepositTransaction(version, chr(operation), chain, deposits)
 
 
 if __name__ == "__main__":
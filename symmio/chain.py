@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Any
+
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.middleware import Web3Middleware
+
+from metrics import RPC_ERRORS, RPC_REQUEST_SECONDS
+
+# how long the chain head (and what is read at it) is served from cache
+CHAIN_HEAD_TTL = float(os.environ.get("CHAIN_HEAD_TTL", 1))
+RPC_TIMEOUT = float(os.environ.get("RPC_TIMEOUT", 10))
+# keep-alive connections per RPC endpoint
+RPC_POOL_SIZE = int(os.environ.get("RPC_POOL_SIZE", 32))
+RPC_KEEPALIVE = float(os.environ.get("RPC_KEEPALIVE", 60))
+MAX_CACHED_CALLS = 4096
+
+
+class RpcMetrics(Web3Middleware):
+    """Times every JSON-RPC request by method, a batch counts as "batch"."""
+
+    def __init__(self, w3: AsyncWeb3, chain: str):
+        super().__init__(w3)
+        self.chain = chain
+
+    async def _timed(self, method: str, request: Awaitable) -> Any:
+        start = time.perf_counter()
+        try:
+            return await request
+        except Exception:
+            RPC_ERRORS.inc(self.chain, method)
+            raise
+        finally:
+            RPC_REQUEST_SECONDS.observe(time.perf_counter() - start, self.chain, method)
+
+    async def async_wrap_make_request(self, make_request):
+        async def middleware(method, params):
+            return await self._timed(method, make_request(method, params))
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request):
+        async def middleware(requests_info):
+            return await self._timed("batch", make_batch_request(requests_info))
+
+        return middleware
+
+
+class ChainClient:
+    """Shared RPC access for one deployment.
+
+    Contract objects are built once. Reads go through `cached`, which
+    coalesces identical calls that are in flight and keeps the result for
+    `head_ttl` seconds, so concurrent polls of the same block cost one RPC
+    call. Independent reads can be sent as one JSON-RPC batch.
+    """
+
+    def __init__(
+        self,
+        rpc: str,
+        withdraw_logger_address: str,
+        withdraw_logger_abi: list,
+        deposit_executor_address: str,
+        deposit_executor_abi: list,
+        head_ttl: float = CHAIN_HEAD_TTL,
+        name: str = "",
+    ):
+        self.name = name
+        self.w3 = AsyncWeb3(
+            AsyncHTTPProvider(rpc, request_kwargs={"timeout": RPC_TIMEOUT})
+        )
+        self.w3.middleware_onion.add(partial(RpcMetrics, chain=name), "rpc_metrics")
+        self.withdraw_logger = self.w3.eth.contract(
+            address=withdraw_logger_address, abi=withdraw_logger_abi
+        )
+        self.deposit_executor = self.w3.eth.contract(
+            address=deposit_executor_address, abi=deposit_executor_abi
+        )
+        self.head_ttl = head_ttl
+        self._session: aiohttp.ClientSession | None = None
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+
+    async def start(self) -> None:
+        """Give the provider a keep-alive session sized for our concurrency."""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=RPC_POOL_SIZE,
+                keepalive_timeout=RPC_KEEPALIVE,
+                ttl_dns_cache=300,
+            ),
+            timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT),
+        )
+        await self.w3.provider.cache_async_session(self._session)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def cached(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float
+    ) -> Any:
+        """Return `fetch()`, shared with identical in-flight and recent calls."""
+        while True:
+            now = time.monotonic()
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # the caller fetching it was cancelled, not us: fetch again
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # retrieved here so a failure nobody waited for is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if len(self._cache) >= MAX_CACHED_CALLS:
+                self._evict(now)
+            self._cache[key] = (time.monotonic() + ttl, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def _evict(self, now: float) -> None:
+        self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        while len(self._cache) >= MAX_CACHED_CALLS:
+            self._cache.pop(next(iter(self._cache)))
+
+    async def head(self) -> int:
+        return await self.cached(
+            "block_number", lambda: self.w3.eth.block_number, self.head_ttl
+        )
+
+    async def gas_price(self) -> int:
+        return await self.cached(
+            "gas_price", lambda: self.w3.eth.gas_price, self.head_ttl
+        )
+
+    async def batch(self, *calls: Awaitable) -> list[Any]:
+        """Send the given reads, e.g. `w3.eth.get_block(n)`, as one request."""
+        async with self.w3.batch_requests() as batch:
+            for call in calls:
+                batch.add(call)
+            return await batch.async_execute()
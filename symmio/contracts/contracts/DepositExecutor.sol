@@ -16,6 +16,7 @@ contract DepositExecutor {
 
     event DepositProcessed(string chain, bytes32 token, address user, uint256 amount);
     event DepositIgnored(string chain, bytes32 token, address user, string reason);
+    event DepositTxFailed(uint256 index, bytes reason);
     event OwnershipTransferred(address indexed previousOwner, address indexed newOwner);
     event PairUpdated(string chain, bytes32 token, bool valid);
 
@@ -84,4 +85,15 @@ contract DepositExecutor {
             emit DepositProcessed(txObj.chain, d.tokenContract, d.user, amount18);
         }
     }
+
+    /// @dev Executes several deposit txs in one transaction to share its fixed cost.
+    /// A tx that reverts is skipped and reported with DepositTxFailed instead of
+    /// reverting the whole batch.
+    function executeDeposits(bytes[] calldata txs) external {
+        for (uint256 i = 0; i < txs.length; i++) {
+            try this.executeDeposit(txs[i]) {} catch (bytes memory reason) {
+                emit DepositTxFailed(i, reason);
+            }
+        }
+    }
 }
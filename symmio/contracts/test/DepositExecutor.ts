@@ -1,6 +1,7 @@
 import { expect } from "chai";
 import { ethers } from "hardhat";
 import { arrayify } from "@ethersproject/bytes";
+import { anyValue } from "@nomicfoundation/hardhat-chai-matchers/withArgs";
 
 const DEPOSIT_TX =
   "0x016461707420200001b12ea2bd1b83a1dc481e18707ad0cf5022501f5040b0bc6ab65842588efd0e0b00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000005f5e1000868bc4564145fceb18cf62bf791d7aa0931d3159f95650a045c0085418c96c23a89bc7406cc6126550fb950711abe38589900dd5dca46c8634935b6c1e0e34f6fc1a57ff3a8630f7dbd7b21d8e6570e3dc4f4d2372f00bd30313efdb710cb892b967aac6a3f6089d6e6bef58ae7938b7952b2fa4016a301633f005247cd68a32014109eedda961df86f70d2839b8acabc57d081f35d52113bf6d11c";
@@ -77,4 +78,13 @@ describe("DepositExecutor", function () {
     const balance = await symmio.balances("0x5fceb18cf62bf791d7aa0931d3159f95650a045c");
     expect(balance).to.equal(BigInt(1e18)); // Should remain unchanged
   });
+
+  it("should execute a batch and report the txs that revert", async () => {
+    const invalidTx = arrayify("0x01");
+    await expect(executor.executeDeposits([txData, invalidTx]))
+      .to.emit(executor, "DepositTxFailed")
+      .withArgs(1, anyValue);
+    const balance = await symmio.balances("0x5fceb18cf62bf791d7aa0931d3159f95650a045c");
+    expect(balance).to.equal(BigInt(1e18)); // replayed deposit is ignored
+  });
 });
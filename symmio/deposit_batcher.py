@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+from hexbytes import HexBytes
+
+from submitter import DepositSubmitter
+
+# verified txs per executeDeposits call, 1 sends each with executeDeposit,
+# which executors deployed before executeDeposits existed require
+DEPOSIT_BATCH_SIZE = int(os.environ.get("DEPOSIT_BATCH_SIZE", 1))
+# seconds the first tx of a batch waits for more to join it
+DEPOSIT_BATCH_WINDOW = float(os.environ.get("DEPOSIT_BATCH_WINDOW", 2))
+
+
+class DepositBatcher:
+    """Collects verified deposit txs and submits them in one transaction.
+
+    A batch is sent once it holds `max_size` txs or `window` seconds after
+    its first tx arrived, whichever comes first. `submit` resolves with the
+    hash of the transaction that carries the tx.
+    """
+
+    def __init__(
+        self,
+        submitter: DepositSubmitter,
+        max_size: int = DEPOSIT_BATCH_SIZE,
+        window: float = DEPOSIT_BATCH_WINDOW,
+    ):
+        self.submitter = submitter
+        self.max_size = max_size
+        self.window = window
+        self._batch: list[tuple[bytes, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_txs = 0
+
+    async def submit(self, deposit_tx: bytes) -> HexBytes:
+        if self.max_size <= 1:
+            tx_hash = await self.submitter.submit([deposit_tx])
+            self.batches += 1
+            self.batched_txs += 1
+            return tx_hash
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((deposit_tx, future))
+        if len(self._batch) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[bytes, asyncio.Future]]) -> None:
+        try:
+            tx_hash = await self.submitter.submit([tx for tx, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_txs += len(batch)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(tx_hash)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "txs_per_batch": self.batched_txs / (self.batches or 1),
+        }
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+
+from eth_hash.auto import keccak
+
+from parse_deposit import parse_deposit_tx
+from storage import Storage
+
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+REVERTED = "reverted"
+REJECTED = "rejected"
+DUPLICATE = "duplicate"
+UNKNOWN = "unknown"
+
+# txs in these states are not verified or submitted again
+SETTLED = (SUBMITTED, CONFIRMED, REJECTED)
+
+
+def tx_digest(tx: bytes) -> bytes:
+    return keccak(tx)
+
+
+def deposit_keys(tx: bytes) -> list[bytes]:
+    """Replay keys of the deposits in `tx`, see DepositExecutor.getDepositKey.
+
+    The contract hashes the chain bytes as they appear in the tx, not the
+    upper-cased name the parser returns.
+    """
+    chain = tx[2:5]
+    return [
+        keccak(chain + deposit.tx_hash + bytes((deposit.vout,)))
+        for deposit in parse_deposit_tx(tx).deposits
+    ]
+
+
+@dataclass
+class LedgerEntry:
+    tx: bytes
+    digest: bytes
+    # None if the tx still has to be verified and submitted
+    status: str | None = None
+    keys: list[bytes] = field(default_factory=list)
+
+
+class DepositLedger:
+    """Remembers which deposit txs and deposits were already handled.
+
+    Looking a tx up only hashes and parses it, so retries of the custody
+    service are answered without signature checks or RPC calls.
+    """
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        # digests currently between lookup and submission
+        self._in_flight: set[bytes] = set()
+
+    def lookup(self, txs: list[bytes]) -> list[LedgerEntry]:
+        entries = [LedgerEntry(tx, tx_digest(tx)) for tx in txs]
+        known = self.storage.get_deposit_txs([entry.digest for entry in entries])
+        for entry in entries:
+            if entry.digest in known:
+                status, tx_hash = known[entry.digest]
+                # a submitted tx without a hash was never broadcast
+                if status in SETTLED and (status != SUBMITTED or tx_hash):
+                    entry.status = status
+                    continue
+            try:
+                entry.keys = deposit_keys(entry.tx)
+            except ValueError:
+                entry.status = REJECTED
+                self.storage.add_deposit_tx(entry.digest, REJECTED)
+                continue
+            used = self.storage.get_used_deposit_keys(entry.keys, entry.digest)
+            if entry.keys and len(used) == len(set(entry.keys)):
+                # every deposit was already submitted by another tx
+                entry.status = DUPLICATE
+        return entries
+
+    def reserve(self, entry: LedgerEntry) -> bool:
+        """Claim a new tx for this request, False if another one has it."""
+        if entry.digest in self._in_flight:
+            return False
+        self._in_flight.add(entry.digest)
+        return True
+
+    def release(self, entry: LedgerEntry) -> None:
+        self._in_flight.discard(entry.digest)
+
+    def status(self, txs: list[bytes]) -> list[tuple[str, str | None]]:
+        """(status, tx_hash) of every tx, (UNKNOWN, None) if never seen."""
+        digests = [tx_digest(tx) for tx in txs]
+        known = self.storage.get_deposit_txs(digests)
+        return [known.get(digest, (UNKNOWN, None)) for digest in digests]
+
+    def rejected(self, entry: LedgerEntry) -> None:
+        self.storage.add_deposit_tx(entry.digest, REJECTED)
+
+    def submitting(self, entry: LedgerEntry) -> None:
+        """Record the tx and its deposit keys before it is broadcast, so its
+        receipt always finds them."""
+        self.storage.add_deposit_tx(entry.digest, SUBMITTED, None, entry.keys)
+
+    def submitted(self, entry: LedgerEntry, tx_hash: str) -> None:
+        self.storage.set_deposit_tx_hash(entry.digest, tx_hash)
+
+    def not_submitted(self, entry: LedgerEntry) -> None:
+        """Undo `submitting` when the broadcast failed."""
+        self.storage.remove_deposit_tx(entry.digest)
+
+    def mined(self, txs: list[bytes], results: list[bool]) -> None:
+        """Called with the outcome of each submitted tx, a reverted tx can be
+        retried."""
+        for tx, success in zip(txs, results):
+            digest = tx_digest(tx)
+            if success:
+                self.storage.set_deposit_tx_status(digest, CONFIRMED, release=False)
+            else:
+                self.storage.set_deposit_tx_status(digest, REVERTED, release=True)
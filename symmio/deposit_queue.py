@@ -0,0 +1,275 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from deposit_batcher import DepositBatcher
+from deposit_ledger import DepositLedger, LedgerEntry, tx_digest
+from deposit_pool import DepositPool
+from metrics import DEPOSIT_STAGE_SECONDS, DEPOSIT_TXS
+from parse_deposit import DepositTransaction
+from storage import Storage
+
+DEPOSIT_QUEUE_WORKERS = int(os.environ.get("DEPOSIT_QUEUE_WORKERS", 4))
+# txs a worker takes from the queue at once
+DEPOSIT_QUEUE_BATCH = int(os.environ.get("DEPOSIT_QUEUE_BATCH", 32))
+DEPOSIT_QUEUE_POLL_INTERVAL = float(os.environ.get("DEPOSIT_QUEUE_POLL_INTERVAL", 1))
+DEPOSIT_MAX_ATTEMPTS = int(os.environ.get("DEPOSIT_MAX_ATTEMPTS", 8))
+# backoff after the n-th failed attempt is min(BASE * 2 ** (n - 1), MAX) seconds
+DEPOSIT_RETRY_BASE = float(os.environ.get("DEPOSIT_RETRY_BASE", 2))
+DEPOSIT_RETRY_MAX = float(os.environ.get("DEPOSIT_RETRY_MAX", 300))
+# finished jobs kept for the latency percentiles
+LATENCY_WINDOW = 1024
+
+SUPPORTED_CHAINS = {"APT"}
+
+
+class DepositQueue:
+    """Durable queue between /deposit and executeDeposit.
+
+    Txs are written to the deposit_jobs table and acknowledged right away.
+    Workers claim due jobs, verify + parse them in the deposit pool and
+    hand the valid ones to the batcher. A broadcast job stays submitted until
+    `mined` sees its receipt. Jobs that fail or revert are retried with
+    exponential backoff and parked as failed after `max_attempts`. Jobs left
+    running or submitted by a crash are requeued on start, the ledger then
+    skips the ones that were broadcast.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        ledger: DepositLedger,
+        pool: DepositPool,
+        batcher: DepositBatcher,
+        workers: int = DEPOSIT_QUEUE_WORKERS,
+        batch_size: int = DEPOSIT_QUEUE_BATCH,
+        max_attempts: int = DEPOSIT_MAX_ATTEMPTS,
+        name: str = "",
+    ):
+        self.name = name
+        self.storage = storage
+        self.ledger = ledger
+        self.pool = pool
+        self.batcher = batcher
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # digest -> (attempts, enqueued_at) of the jobs waiting on a receipt
+        self._submitted: dict[bytes, tuple[int, float]] = {}
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def enqueue(self, txs: list[bytes]) -> None:
+        with DEPOSIT_STAGE_SECONDS.time(self.name, "enqueue"):
+            jobs = [(tx_digest(tx), tx) for tx in txs]
+            await asyncio.to_thread(
+                self.storage.enqueue_deposit_jobs, jobs, time.time()
+            )
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        recovered = await asyncio.to_thread(self.storage.recover_deposit_jobs)
+        if recovered:
+            print(f"Requeued {recovered} interrupted deposit jobs")
+        await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                jobs = await asyncio.to_thread(
+                    self.storage.claim_deposit_jobs, self.batch_size, time.time()
+                )
+            except Exception as e:
+                print(f"Claiming deposit jobs failed: {e}")
+                jobs = []
+            if not jobs:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), DEPOSIT_QUEUE_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._handle(jobs)
+            except Exception as e:
+                print(f"Deposit worker error: {e}")
+                await self._requeue(jobs, e)
+
+    async def _requeue(self, jobs: list[tuple], error: Exception) -> None:
+        """Queue the jobs of a failed `_handle` again, except the ones
+        waiting on a receipt. Updating a finished one changes nothing."""
+        for digest, _, attempts, _ in jobs:
+            if digest in self._submitted:
+                continue
+            try:
+                await self._retry(digest, attempts, error)
+            except Exception as e:
+                # left running, the next start requeues it
+                print(f"Requeueing deposit job {digest.hex()} failed: {e}")
+
+    async def _handle(self, jobs: list[tuple]) -> None:
+        attempts = {digest: n for digest, _, n, _ in jobs}
+        enqueued_at = {digest: t for digest, _, _, t in jobs}
+        now = time.time()
+        for t in enqueued_at.values():
+            DEPOSIT_STAGE_SECONDS.observe(now - t, self.name, "queue_wait")
+        try:
+            with DEPOSIT_STAGE_SECONDS.time(self.name, "ledger"):
+                entries = await asyncio.to_thread(
+                    self.ledger.lookup, [tx for _, tx, _, _ in jobs]
+                )
+        except Exception as e:
+            for digest in attempts:
+                await self._retry(digest, attempts[digest], e)
+            return
+
+        new_entries = [
+            entry
+            for entry in entries
+            if entry.status is None and self.ledger.reserve(entry)
+        ]
+        try:
+            try:
+                parsed_txs = await self.pool.process(
+                    [e.tx for e in new_entries], self.name
+                )
+            except Exception as e:
+                for entry in new_entries:
+                    await self._retry(entry.digest, attempts[entry.digest], e)
+                return
+
+            # concurrently, so that the batcher can put them in one tx
+            await asyncio.gather(
+                *(
+                    self._submit(entry, parsed_tx, attempts, enqueued_at)
+                    for entry, parsed_tx in zip(new_entries, parsed_txs)
+                )
+            )
+        finally:
+            for entry in new_entries:
+                self.ledger.release(entry)
+
+        # settled, duplicate or rejected while parsing
+        handled = {id(entry) for entry in new_entries}
+        for entry in entries:
+            if id(entry) not in handled:
+                DEPOSIT_TXS.inc(self.name, "ignored")
+                await self._finish(entry.digest, enqueued_at[entry.digest])
+
+    async def _submit(
+        self,
+        entry: LedgerEntry,
+        parsed_tx: DepositTransaction | None,
+        attempts: dict[bytes, int],
+        enqueued_at: dict[bytes, float],
+    ) -> None:
+        try:
+            if parsed_tx is None:
+                DEPOSIT_TXS.inc(self.name, "rejected")
+                await asyncio.to_thread(self.ledger.rejected, entry)
+            elif parsed_tx.chain not in SUPPORTED_CHAINS:
+                print(f"Invalid deposit chain {parsed_tx.chain}")
+                DEPOSIT_TXS.inc(self.name, "ignored")
+                await asyncio.to_thread(self.ledger.rejected, entry)
+            else:
+                print(parsed_tx)
+                DEPOSIT_TXS.inc(self.name, "verified")
+                await asyncio.to_thread(self._submitting, entry)
+                self._submitted[entry.digest] = (
+                    attempts[entry.digest],
+                    enqueued_at[entry.digest],
+                )
+                try:
+                    # the receipt settles the job, see mined
+                    tx_hash = await self.batcher.submit(entry.tx)
+                except Exception:
+                    self._submitted.pop(entry.digest, None)
+                    await asyncio.to_thread(self.ledger.not_submitted, entry)
+                    raise
+                await asyncio.to_thread(
+                    self.ledger.submitted, entry, tx_hash.to_0x_hex()
+                )
+                return
+        except Exception as e:
+            await self._retry(entry.digest, attempts[entry.digest], e)
+            return
+        await self._finish(entry.digest, enqueued_at[entry.digest])
+
+    def _submitting(self, entry: LedgerEntry) -> None:
+        # before the broadcast, so that the receipt finds both
+        self.ledger.submitting(entry)
+        self.storage.submit_deposit_job(entry.digest)
+
+    def mined(self, txs: list[bytes], results: list[bool]) -> None:
+        """`on_mined` of the submitter, runs in a thread.
+
+        Finishes the jobs of the deposit txs that went through and queues
+        the reverted ones again.
+        """
+        self.ledger.mined(txs, results)
+        for tx, success in zip(txs, results):
+            digest = tx_digest(tx)
+            job = self._submitted.pop(digest, None)
+            if job is None:
+                # broadcast before a restart, the job was requeued already
+                continue
+            attempts, enqueued_at = job
+            if success:
+                self._finish_job(digest, enqueued_at)
+            else:
+                self._retry_job(digest, attempts, "executeDeposit reverted")
+
+    async def _finish(self, digest: bytes, enqueued_at: float) -> None:
+        await asyncio.to_thread(self._finish_job, digest, enqueued_at)
+
+    def _finish_job(self, digest: bytes, enqueued_at: float) -> None:
+        self.storage.finish_deposit_job(digest)
+        self._latencies.append(time.time() - enqueued_at)
+        self.processed += 1
+
+    async def _retry(self, digest: bytes, attempts: int, error: Exception) -> None:
+        await asyncio.to_thread(self._retry_job, digest, attempts, str(error))
+
+    def _retry_job(self, digest: bytes, attempts: int, error: str) -> None:
+        if attempts >= self.max_attempts:
+            print(f"Deposit job {digest.hex()} failed for good: {error}")
+            run_at = None
+            self.failed += 1
+        else:
+            delay = min(DEPOSIT_RETRY_BASE * 2 ** (attempts - 1), DEPOSIT_RETRY_MAX)
+            print(f"Deposit job {digest.hex()} failed, retrying in {delay}s: {error}")
+            run_at = time.time() + delay
+            self.retried += 1
+        self.storage.retry_deposit_job(digest, run_at, error)
+
+    def stats(self) -> dict:
+        """Queue depth per state, age of the oldest job and latency percentiles."""
+        now = time.time()
+        states = self.storage.deposit_job_stats()
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "depth": {state: count for state, (count, _) in states.items()},
+            "oldest_age": {
+                state: now - oldest for state, (_, oldest) in states.items()
+            },
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+            **self.batcher.stats(),
+            **self.batcher.submitter.stats(),
+        }
@@ -0,0 +1,138 @@
+import os
+from collections.abc import Awaitable, Callable
+from typing import Protocol
+
+from chain import ChainClient
+from parse_deposit import HEADER
+
+FEE_STRATEGY = os.environ.get("FEE_STRATEGY", "eip1559")
+# blocks of eth_feeHistory the priority fee is taken from
+FEE_HISTORY_BLOCKS = int(os.environ.get("FEE_HISTORY_BLOCKS", 10))
+# percentile of the priority fees paid in those blocks
+FEE_PERCENTILE = float(os.environ.get("FEE_PERCENTILE", 50))
+# maxFeePerGas covers the base fee growing this many times, 2 is ~6 full blocks
+BASE_FEE_MULTIPLIER = float(os.environ.get("BASE_FEE_MULTIPLIER", 2))
+LEGACY_GAS_PRICE_MULTIPLIER = float(os.environ.get("LEGACY_GAS_PRICE_MULTIPLIER", 3))
+# replacements must pay at least 10% more, see geth's txpool price bump
+FEE_BUMP = 1.125
+# most a replacement may pay per gas (maxFeePerGas or gasPrice) in wei, 0 for
+# no limit besides MAX_FEE_BUMPS
+MAX_FEE_PER_GAS = int(os.environ.get("MAX_FEE_PER_GAS", 0))
+# replacements of one tx, 10 bumps are ~3.2x its first fees
+MAX_FEE_BUMPS = int(os.environ.get("MAX_FEE_BUMPS", 10))
+# gas limit over the estimate, only the gas actually used is paid
+GAS_MARGIN = float(os.environ.get("GAS_MARGIN", 1.2))
+
+FEE_FIELDS = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas")
+
+
+class FeeStrategy(Protocol):
+    async def fees(self) -> dict[str, int]:
+        """Fee fields for a new tx."""
+        ...
+
+
+def bump_fees(
+    tx: dict, fees: dict[str, int], max_fee: int = MAX_FEE_PER_GAS
+) -> dict[str, int] | None:
+    """Fees for replacing `tx`: FEE_BUMP over its fees, or `fees` if higher.
+
+    None if they would pay more than `max_fee` per gas.
+    """
+    bumped = {
+        field: max(int(tx[field] * FEE_BUMP) + 1, value)
+        for field, value in fees.items()
+        if field in FEE_FIELDS
+    }
+    price = bumped.get("maxFeePerGas", bumped.get("gasPrice", 0))
+    if max_fee and price > max_fee:
+        return None
+    return bumped
+
+
+class LegacyFees:
+    """gasPrice as a multiple of eth_gasPrice, for chains without EIP-1559."""
+
+    def __init__(
+        self, client: ChainClient, multiplier: float = LEGACY_GAS_PRICE_MULTIPLIER
+    ):
+        self.client = client
+        self.multiplier = multiplier
+
+    async def fees(self) -> dict[str, int]:
+        return {"gasPrice": int(await self.client.gas_price() * self.multiplier)}
+
+
+class Eip1559Fees:
+    """Priority fee from recent blocks, max fee from the next base fee."""
+
+    def __init__(
+        self,
+        client: ChainClient,
+        blocks: int = FEE_HISTORY_BLOCKS,
+        percentile: float = FEE_PERCENTILE,
+        base_fee_multiplier: float = BASE_FEE_MULTIPLIER,
+    ):
+        self.client = client
+        self.blocks = blocks
+        self.percentile = percentile
+        self.base_fee_multiplier = base_fee_multiplier
+
+    async def _fetch(self) -> dict[str, int]:
+        w3 = self.client.w3
+        history = await w3.eth.fee_history(self.blocks, "latest", [self.percentile])
+        # the last entry is the base fee of the next block
+        if history["baseFeePerGas"]:
+            base_fee = history["baseFeePerGas"][-1]
+        else:
+            base_fee = (await w3.eth.get_block("latest"))["baseFeePerGas"]
+        rewards = sorted(reward[0] for reward in history["reward"])
+        tip = rewards[len(rewards) // 2] if rewards else 0
+        if not tip:
+            # empty blocks, let the node suggest one
+            tip = await w3.eth.max_priority_fee
+        return {
+            "maxFeePerGas": int(base_fee * self.base_fee_multiplier) + tip,
+            "maxPriorityFeePerGas": tip,
+        }
+
+    async def fees(self) -> dict[str, int]:
+        return await self.client.cached("fees", self._fetch, self.client.head_ttl)
+
+
+FEE_STRATEGIES: dict[str, Callable[[ChainClient], FeeStrategy]] = {
+    "legacy": LegacyFees,
+    "eip1559": Eip1559Fees,
+}
+
+
+def deposits_shape(deposit_txs: list[bytes]) -> tuple[int, int, int]:
+    """What the gas of executing deposit txs depends on: tx count, deposit
+    count and calldata size."""
+    count = sum(HEADER.unpack_from(tx)[5] for tx in deposit_txs)
+    return len(deposit_txs), count, sum(len(tx) for tx in deposit_txs)
+
+
+class GasEstimates:
+    """executeDeposit(s) gas limits by calldata shape.
+
+    Every tx is estimated, which also fails a tx that would revert before
+    it is broadcast. The highest gas seen for a shape is kept as a floor,
+    so a tx whose estimate comes out low still gets the limit its shape
+    needed before, plus GAS_MARGIN.
+    """
+
+    def __init__(self, margin: float = GAS_MARGIN):
+        self.margin = margin
+        self._floors: dict[tuple[int, int, int], int] = {}
+
+    async def gas(
+        self, shape: tuple[int, int, int], estimate: Callable[[], Awaitable[int]]
+    ) -> int:
+        gas = max(await estimate(), self._floors.get(shape, 0))
+        self._floors[shape] = gas
+        return int(gas * self.margin)
+
+    def ran_out(self, shape: tuple[int, int, int], gas_limit: int) -> None:
+        """Raise the floor of a shape whose tx ran out of gas."""
+        self._floors[shape] = max(self._floors.get(shape, 0), gas_limit)
@@ -1,100 +1,126 @@
+import asyncio
 import sys
 import os
 import json
 import sqlite3
-from contextlib import contextmanager
-from fastapi import APIRouter, FastAPI, Query, HTTPException
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+from fastapi import APIRouter, BackgroundTasks, FastAPI, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from web3 import AsyncHTTPProvider, AsyncWeb3
-from eth_account import Account
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from parse_deposit import DepositTransaction
-from verify_deposit import verify_deposit_tx
-from id2address_apt import compute_apt_address
+from deposit_ledger import SETTLED, tx_digest
+from deposit_pool import DepositPool
+from deposit_stream import iter_deposit_txs
+from metrics import DEPOSIT_STAGE_SECONDS, REGISTRY, Gauge, profiler
+from storage import Storage
+from id2address_apt import iter_apt_addresses
+
+if TYPE_CHECKING:
+    from relayer import ChainRelayer
 
 FINALITY_BLOCKS = 1
 PRIVATE_KEY = os.environ["PRIVATE_KEY"]
-ACCOUNT_ADDRESS = Account.from_key(PRIVATE_KEY).address
+# start_block: first block the withdrawal index reads, None finds the block
+# the WithdrawLogger was deployed in
 DEPLOYMENTS = {
     "SEP": {
         "rpc": "https://ethereum-sepolia-rpc.publicnode.com",
         "withdraw_logger_address": "0x2546042e663eF294bC6893D2615c867a28d38983",
         "deposit_executor_address": "0x1C6f721C0588338Ba7a80B20036F1D5627d46276",
+        "start_block": None,
     },
     "POL": {
         "rpc": "https://polygon-bor-rpc.publicnode.com",
         "withdraw_logger_address": "0x2546042e663eF294bC6893D2615c867a28d38983",
         "deposit_executor_address": "0x787FCe8e2Ee89C2015c02ae91D91bECC17e649A5",
+        "start_block": None,
     },
     "BASE": {
         "rpc": "https://base.drpc.org",
         "withdraw_logger_address": "0xf893D81CC438dC44c25dD6F22a2422c26C626C9c",
         "deposit_executor_address": "0x9A51E128906bEcbA69201f1DA32f61b92eF8c6Cc",
+        "start_block": None,
+    },
+    # contracts deployed to a local hardhat/anvil node for testing
+    "LOCAL": {
+        "rpc": os.environ.get("LOCAL_RPC", "http://127.0.0.1:8545"),
+        "withdraw_logger_address": os.environ.get("LOCAL_WITHDRAW_LOGGER_ADDRESS"),
+        "deposit_executor_address": os.environ.get("LOCAL_DEPOSIT_EXECUTOR_ADDRESS"),
+        "start_block": int(os.environ.get("LOCAL_WITHDRAW_START_BLOCK", 0)),
     },
 }
 
-DEPLOYMENT = DEPLOYMENTS["BASE"]
-w3 = AsyncWeb3(AsyncHTTPProvider(DEPLOYMENT["rpc"]))
+# served under /<name>/..., the default one also without the prefix
+DEFAULT_DEPLOYMENT = os.environ.get("DEPLOYMENT", "BASE")
+RELAYER_DEPLOYMENTS = os.environ.get("RELAYER_DEPLOYMENTS")
+if RELAYER_DEPLOYMENTS:
+    RELAYER_DEPLOYMENTS = RELAYER_DEPLOYMENTS.split(",")
+else:
+    RELAYER_DEPLOYMENTS = [
+        name
+        for name, deployment in DEPLOYMENTS.items()
+        if deployment["deposit_executor_address"] or name == DEFAULT_DEPLOYMENT
+    ]
+if DEFAULT_DEPLOYMENT not in RELAYER_DEPLOYMENTS:
+    RELAYER_DEPLOYMENTS.append(DEFAULT_DEPLOYMENT)
 
 CHAIN2ID = {"APT": 2}
 
-with open("WithdrawLogger.json") as f:
-    WITHDRAW_LOGGER_ABI = json.load(f)
+ABI_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
-with open("DepositExecutor.json") as f:
-    DEPOSIT_EXECUTOR_ABI = json.load(f)
+def load_abi(name: str) -> list:
+    with open(os.path.join(ABI_DIR, f"{name}.json")) as f:
+        return json.load(f)
 
 
 router = APIRouter()
+deposit_pool = DepositPool()
 
 DB_PATH = "relayer.db"
-
-
-def init_db() -> None:
-    """Create DB + salts table if missing."""
-    con = sqlite3.connect(DB_PATH)
-    try:
-        con.execute("PRAGMA journal_mode=WAL;")  # better concurrency for reads
-        con.execute("""
-            CREATE TABLE IF NOT EXISTS salts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                address TEXT NOT NULL UNIQUE COLLATE NOCASE
-            );
-        """)
-        con.commit()
-    finally:
-        con.close()
-
-
-init_db()
-
-
-@contextmanager
-def db():
-    con = sqlite3.connect(DB_PATH, timeout=10)
-    try:
-        yield con
-        con.commit()
-    finally:
-        con.close()
-
-
-def insert_eth_addresses(addresses: list[str]) -> None:
-    """
-    Insert unique (case-insensitive) ETH addresses into salts.
-    Uses INSERT OR IGNORE so existing rows are left untouched.
-    """
-    if not addresses:
-        return
-    normalized = {a.lower() for a in addresses}  # dedupe before hitting the DB
-    with db() as con:
-        con.executemany(
-            "INSERT OR IGNORE INTO salts(address) VALUES (?)",
-            [(a,) for a in normalized],
+# deposit address -> user lookups, empty to not keep the table
+ADDRESS_TABLE_PATH = os.environ.get("ADDRESS_TABLE_PATH", "addresses.bin") or None
+storage = Storage(DB_PATH, address_table=ADDRESS_TABLE_PATH)
+
+
+def chain_storage(name: str) -> Storage:
+    """The default deployment keeps its state in relayer.db next to the users."""
+    if name == DEFAULT_DEPLOYMENT:
+        return storage
+    chain_db = Storage(f"relayer_{name.lower()}.db")
+    chain_db.init()
+    return chain_db
+
+
+# built on startup, importing this module does not load web3 or the key
+relayers: dict[str, "ChainRelayer"] = {}
+
+
+def build_relayers() -> None:
+    from eth_account import Account
+
+    from relayer import ChainRelayer
+
+    account = Account.from_key(PRIVATE_KEY)
+    withdraw_logger_abi = load_abi("WithdrawLogger")
+    deposit_executor_abi = load_abi("DepositExecutor")
+    for name in RELAYER_DEPLOYMENTS:
+        relayers[name] = ChainRelayer(
+            name,
+            DEPLOYMENTS[name],
+            account,
+            chain_storage(name),
+            deposit_pool,
+            withdraw_logger_abi,
+            deposit_executor_abi,
+            FINALITY_BLOCKS,
         )
 
 
@@ -105,38 +131,79 @@ class AddressMapping(BaseModel):
 
 class AddressesResponse(BaseModel):
     addresses: dict[str, AddressMapping]
+    errors: dict[str, str] = {}
+
+
+def store_apt_addresses(derived: dict[str, str]) -> None:
+    try:
+        storage.insert_apt_addresses(derived)
+    except sqlite3.Error as e:
+        print(f"Storing addresses failed: {e}")
 
 
 @router.post("/vibe/deposit/addresses", response_model=AddressesResponse)
-def convert_eth_to_aptos(eth_addresses: list[str]):
+async def convert_eth_to_aptos(
+    eth_addresses: list[str], background_tasks: BackgroundTasks
+):
     if not eth_addresses:
         raise HTTPException(status_code=400, detail="No Ethereum addresses provided.")
 
     try:
-        result = {
-            addr: AddressMapping(apt=compute_apt_address(addr))
-            for addr in eth_addresses
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Conversion error: {e}")
-
-    try:
-        insert_eth_addresses(eth_addresses)
+        stored = await run_in_threadpool(storage.get_apt_addresses, eth_addresses)
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-    return AddressesResponse(addresses=result)
+    derived: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    missing = [addr for addr in eth_addresses if addr not in stored]
+    async for chunk in iter_apt_addresses(missing):
+        for addr, apt_addr, error in chunk:
+            if error is None:
+                derived[addr] = apt_addr
+            else:
+                errors[addr] = f"Conversion error: {error}"
+
+    # written after the response is sent
+    background_tasks.add_task(store_apt_addresses, derived)
+
+    result = {
+        addr: AddressMapping(apt=stored.get(addr) or derived[addr])
+        for addr in eth_addresses
+        if addr in stored or addr in derived
+    }
+    return AddressesResponse(addresses=result, errors=errors)
+
+
+async def iter_address_lines(eth_addresses: list[str]) -> AsyncIterator[str]:
+    stored = await run_in_threadpool(storage.get_apt_addresses, eth_addresses)
+    for addr, apt_addr in stored.items():
+        yield json.dumps({"eth": addr, "apt": apt_addr}) + "\n"
+
+    missing = [addr for addr in eth_addresses if addr not in stored]
+    async for chunk in iter_apt_addresses(missing):
+        derived = {addr: apt_addr for addr, apt_addr, error in chunk if error is None}
+        await run_in_threadpool(store_apt_addresses, derived)
+        for addr, apt_addr, error in chunk:
+            if error is None:
+                yield json.dumps({"eth": addr, "apt": apt_addr}) + "\n"
+            else:
+                yield json.dumps({"eth": addr, "error": error}) + "\n"
+
+
+@router.post("/vibe/deposit/addresses/stream")
+async def stream_eth_to_aptos(eth_addresses: list[str]):
+    """Same as /vibe/deposit/addresses, one NDJSON line per address as it is ready."""
+    if not eth_addresses:
+        raise HTTPException(status_code=400, detail="No Ethereum addresses provided.")
+
+    return StreamingResponse(
+        iter_address_lines(eth_addresses), media_type="application/x-ndjson"
+    )
 
 
 @router.get("/user/count")
-async def get_last_user_id() -> dict[str, int]:
-    try:
-        with db() as con:  # uses the db() context manager from earlier
-            cur = con.execute("SELECT COUNT(*) FROM salts")
-            (count,) = cur.fetchone()
-        return {"count": int(count)}
-    except sqlite3.Error as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+def get_last_user_id() -> dict[str, int]:
+    return {"count": storage.count_users()}
 
 
 class User(BaseModel):
@@ -150,72 +217,76 @@ def get_users(
     limit: int = Query(10, ge=1, le=100),
 ):
     try:
-        with db() as con:  # uses the `db()` context manager from earlier
-            cur = con.execute("SELECT id, address FROM salts ORDER BY id")
-            rows = cur.fetchall()
+        addresses = storage.fetch_users(offset, limit)
         return [
-            User(id=offset + i, salt=int(row[1], 0))
-            for i, row in enumerate(rows[offset : offset + limit])
+            User(id=offset + i, salt=int(address, 0))
+            for i, address in enumerate(addresses)
         ]
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
 
-@router.post("/deposit")
-async def deposit(deposit_txs: list[str]) -> dict[str, bool]:
-    deposit_txs = [tx.encode("latin-1") for tx in deposit_txs]
-    for deposit_tx in deposit_txs:
-        if verify_deposit_tx(deposit_tx):
-            parsed_tx = DepositTransaction.from_tx(deposit_tx)
-            print(parsed_tx)
-            chain = parsed_tx.chain
-            assert chain == "APT", f"Invalid deposit chain {chain}"
-            contract_address = DEPLOYMENT["deposit_executor_address"]
-            executor = w3.eth.contract(
-                address=contract_address, abi=DEPOSIT_EXECUTOR_ABI
-            )
+@router.post("/users/by-salt", response_model=list[User])
+def find_users(salts: list[str]):
+    """The users of the given salts, e.g. `Deposit.salt` of incoming deposits.
 
-            tx = executor.functions.executeDeposit(deposit_tx)
-            gas_estimate = await tx.estimate_gas({"from": ACCOUNT_ADDRESS})
-            gas_price = await w3.eth.gas_price
-            tx_dict = await tx.build_transaction(
-                {
-                    "from": ACCOUNT_ADDRESS,
-                    "nonce": await w3.eth.get_transaction_count(ACCOUNT_ADDRESS),
-                    "gas": gas_estimate,
-                    "gasPrice": gas_price * 3,
-                }
-            )
+    Salts that belong to no user are left out.
+    """
+    try:
+        found = storage.find_users(salts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid salt: {e}")
+    return [User(id=user_id, salt=int(salt, 16)) for salt, user_id in found.items()]
 
-            signed_tx = w3.eth.account.sign_transaction(
-                tx_dict, private_key=PRIVATE_KEY
-            )
-            tx_hash = await w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
-            print(f"Transaction sent: {tx_hash.hex()}")
-            receipt = await w3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"Transaction mined in block {receipt.blockNumber}")
+class AddressOwner(BaseModel):
+    address: str
+    id: int
+    chain: str
 
-        else:
-            return {"success": False}
 
-    return {"success": True}
+@router.post("/users/by-address", response_model=list[AddressOwner])
+def find_address_owners(addresses: list[str]):
+    """The user and chain of each deposit address, from the address table.
 
+    Addresses that belong to no user are left out.
+    """
+    try:
+        found = storage.find_addresses(addresses)
+    except LookupError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return [
+        AddressOwner(address=address, id=user_id, chain=chain)
+        for address, (user_id, chain) in found.items()
+    ]
 
-@router.get("/withdraw/count")
-async def get_last_withdraw_id(chain: str = Query(...)) -> dict[str, int | str]:
-    if chain not in CHAIN2ID:
-        raise HTTPException(status_code=400, detail="Unsupported chain")
 
-    contract_address = DEPLOYMENT["withdraw_logger_address"]
-    withdrawal_chain_id = CHAIN2ID[chain]
-    contract = w3.eth.contract(address=contract_address, abi=WITHDRAW_LOGGER_ABI)
-    current_block = await w3.eth.block_number
-    block_number = current_block - FINALITY_BLOCKS
-    count = await contract.functions.getWithdrawCount(withdrawal_chain_id).call(
-        block_identifier=block_number
-    )
-    return {"chain": chain, "count": count}
+USERS_EXPORT_BATCH = 10_000
+
+
+def iter_users_json() -> Iterator[str]:
+    yield "["
+    i = 0
+    for addresses in storage.iter_users(USERS_EXPORT_BATCH):
+        items = ",".join(
+            f'{{"salt":{int(address, 0)},"id":{i + j}}}'
+            for j, address in enumerate(addresses)
+        )
+        yield "," + items if i else items
+        i += len(addresses)
+    yield "]"
+
+
+@router.get("/users/export")
+def export_users():
+    """Stream every user as one JSON array, same shape as /users."""
+    return StreamingResponse(iter_users_json(), media_type="application/json")
+
+
+class DepositStatus(BaseModel):
+    digest: str
+    status: str
+    tx_hash: str | None = None
 
 
 class Withdraw(BaseModel):
@@ -228,43 +299,255 @@ class Withdraw(BaseModel):
     id: int
 
 
-@router.get("/withdraws", response_model=list[Withdraw])
-async def get_withdraws(
-    chain: str = Query(...),
-    offset: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100),
-):
-    if chain not in CHAIN2ID:
-        raise HTTPException(status_code=400, detail="Unsupported chain")
+def make_chain_router(name: str) -> APIRouter:
+    """Deposit and withdrawal routes of one deployment."""
+    chain_router = APIRouter()
+
+    @chain_router.post("/deposit")
+    async def deposit(deposit_txs: list[str]) -> dict[str, bool]:
+        """Queue the txs, they are verified and executed by the deposit workers."""
+        relayer = relayers[name]
+        with DEPOSIT_STAGE_SECONDS.time(relayer.name, "decode"):
+            txs = [tx.encode("latin-1") for tx in deposit_txs]
+        try:
+            await relayer.queue.enqueue(txs)
+        except sqlite3.Error as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+        return {"success": True}
+
+    @chain_router.post("/deposit/stream")
+    async def deposit_stream(request: Request) -> dict[str, bool | int]:
+        """Same as /deposit, with the raw txs queued as the body arrives.
+
+        The body is either application/octet-stream, each tx after its 4-byte
+        big-endian length, or application/x-ndjson with a base64 tx per line.
+        """
+        relayer = relayers[name]
+        try:
+            batches = iter_deposit_txs(
+                request.headers.get("content-type"), request.stream()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+
+        queued = 0
+        try:
+            async for deposit_txs in batches:
+                await relayer.queue.enqueue(deposit_txs)
+                queued += len(deposit_txs)
+        except ValueError as e:
+            # the txs before the bad one stay queued
+            raise HTTPException(
+                status_code=400, detail=f"{e}, {queued} txs before it were queued"
+            )
+        except sqlite3.Error as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+        return {"success": True, "count": queued}
+
+    @chain_router.post("/deposit/status", response_model=list[DepositStatus])
+    def deposit_status(deposit_txs: list[str]):
+        """Where each deposit tx is, without verifying or submitting anything."""
+        relayer = relayers[name]
+        txs = [tx.encode("latin-1") for tx in deposit_txs]
+        try:
+            statuses = relayer.ledger.status(txs)
+            queued = relayer.storage.get_deposit_job_states(
+                [tx_digest(tx) for tx in txs]
+            )
+        except sqlite3.Error as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+        result = []
+        for tx, (status, tx_hash) in zip(txs, statuses):
+            digest = tx_digest(tx)
+            if status not in SETTLED:
+                # e.g. a reverted tx that was sent again
+                status = queued.get(digest, status)
+            result.append(
+                DepositStatus(
+                    digest="0x" + digest.hex(), status=status, tx_hash=tx_hash
+                )
+            )
+        return result
+
+    @chain_router.get("/deposit/queue")
+    def deposit_queue_stats() -> dict:
+        relayer = relayers[name]
+        try:
+            return relayer.queue.stats()
+        except sqlite3.Error as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    @chain_router.get("/withdraw/count")
+    async def get_last_withdraw_id(chain: str = Query(...)) -> dict[str, int | str]:
+        relayer = relayers[name]
+        chain_client = relayer.client
+        if chain not in CHAIN2ID:
+            raise HTTPException(status_code=400, detail="Unsupported chain")
+
+        withdrawal_chain_id = CHAIN2ID[chain]
+        if relayer.indexer.synced:
+            count = await run_in_threadpool(
+                relayer.storage.count_withdrawals, withdrawal_chain_id
+            )
+            return {"chain": chain, "count": count}
+
+        async with relayer.limit:
+            block_number = await chain_client.head() - FINALITY_BLOCKS
+            count = await chain_client.cached(
+                ("getWithdrawCount", withdrawal_chain_id, block_number),
+                lambda: chain_client.withdraw_logger.functions.getWithdrawCount(
+                    withdrawal_chain_id
+                ).call(block_identifier=block_number),
+                chain_client.head_ttl,
+            )
+        return {"chain": chain, "count": count}
+
+    @chain_router.get("/withdraws", response_model=list[Withdraw])
+    async def get_withdraws(
+        chain: str = Query(...),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+    ):
+        relayer = relayers[name]
+        chain_client = relayer.client
+        if chain not in CHAIN2ID:
+            raise HTTPException(status_code=400, detail="Unsupported chain")
+
+        withdrawal_chain_id = CHAIN2ID[chain]
+        if relayer.indexer.synced:
+            timestamp = relayer.indexer.head_timestamp
+            withdrawals = await run_in_threadpool(
+                relayer.storage.get_withdrawals,
+                withdrawal_chain_id,
+                offset,
+                offset + limit,
+            )
+            return [
+                {
+                    "chain": chain,
+                    "id": wid,
+                    "tokenContract": token,
+                    "amount": amount,
+                    "destination": destination,
+                    "user_id": int(user, 16),
+                    "t": timestamp,
+                }
+                for wid, token, amount, destination, user in withdrawals
+            ]
+
+        async with relayer.limit:
+            block_number = await chain_client.head() - FINALITY_BLOCKS
+            # the block and the withdrawals at it in one JSON-RPC batch
+            block, withdrawals = await chain_client.cached(
+                ("getWithdrawals", withdrawal_chain_id, offset, limit, block_number),
+                lambda: chain_client.batch(
+                    chain_client.w3.eth.get_block(block_number),
+                    chain_client.withdraw_logger.functions.getWithdrawals(
+                        withdrawal_chain_id, offset, offset + limit
+                    ).call(block_identifier=block_number),
+                ),
+                chain_client.head_ttl,
+            )
+        timestamp = block["timestamp"]
+
+        return [
+            {
+                "chain": chain,
+                "id": withdrawal[0],
+                "tokenContract": "0x" + withdrawal[1].hex(),
+                "amount": str(withdrawal[2]),
+                "destination": "0x" + withdrawal[3].hex(),
+                "user_id": int(withdrawal[4], 16),
+                "t": timestamp,
+            }
+            for withdrawal in withdrawals
+        ]
 
-    contract_address = DEPLOYMENT["withdraw_logger_address"]
-    withdrawal_chain_id = CHAIN2ID[chain]
-    contract = w3.eth.contract(address=contract_address, abi=WITHDRAW_LOGGER_ABI)
-    current_block = await w3.eth.block_number
-    block_number = current_block - FINALITY_BLOCKS
+    return chain_router
 
-    block = await w3.eth.get_block(block_number)
-    timestamp = block["timestamp"]
 
-    withdrawals = await contract.functions.getWithdrawals(
-        withdrawal_chain_id, offset, offset + limit
-    ).call(block_identifier=block_number)
+def collect_queue_jobs() -> dict[tuple, float]:
+    return {
+        (name, state): count
+        for name, relayer in relayers.items()
+        for state, (count, _) in relayer.storage.deposit_job_stats().items()
+    }
 
-    return [
-        {
-            "chain": chain,
-            "id": withdrawal[0],
-            "tokenContract": "0x" + withdrawal[1].hex(),
-            "amount": str(withdrawal[2]),
-            "destination": "0x" + withdrawal[3].hex(),
-            "user_id": int.from_bytes(withdrawal[4], "big"),
-            "t": timestamp,
-        }
-        for withdrawal in withdrawals
-    ]
 
+def collect_queue_oldest_age() -> dict[tuple, float]:
+    now = time.time()
+    return {
+        (name, state): now - oldest
+        for name, relayer in relayers.items()
+        for state, (_, oldest) in relayer.storage.deposit_job_stats().items()
+    }
 
-app = FastAPI()
+
+def collect_pending_txs() -> dict[tuple, float]:
+    return {(name,): relayer.submitter.pending for name, relayer in relayers.items()}
+
+
+REGISTRY.register(
+    Gauge(
+        "deposit_queue_jobs",
+        "Deposit jobs in the queue by state.",
+        ("chain", "state"),
+        collect_queue_jobs,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "deposit_queue_oldest_age_seconds",
+        "Age of the oldest deposit job by state.",
+        ("chain", "state"),
+        collect_queue_oldest_age,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "deposit_pending_txs",
+        "executeDeposit(s) txs broadcast and not mined yet.",
+        ("chain",),
+        collect_pending_txs,
+    )
+)
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Prometheus metrics of every deployment."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/metrics/profile")
+def get_profile(reset: bool = Query(False)):
+    """Sampled stacks in the collapsed format, see METRICS_PROFILE_INTERVAL."""
+    if profiler.interval <= 0:
+        raise HTTPException(
+            status_code=404, detail="Set METRICS_PROFILE_INTERVAL to profile."
+        )
+    return PlainTextResponse(profiler.collapsed(reset))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    storage.init()
+    build_relayers()
+    profiler.start()
+    await asyncio.gather(*(relayer.start() for relayer in relayers.values()))
+    yield
+    await asyncio.gather(*(relayer.stop() for relayer in relayers.values()))
+    profiler.stop()
+    deposit_pool.shutdown()
+    for relayer in relayers.values():
+        if relayer.storage is not storage:
+            relayer.storage.close()
+    storage.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # allow all origins (dev only)
@@ -273,3 +556,8 @@ app.add_middleware(
     allow_headers=["*"],  # or specific headers
 )
 app.include_router(router)
+for name in RELAYER_DEPLOYMENTS:
+    chain_router = make_chain_router(name)
+    app.include_router(chain_router, prefix=f"/{name.lower()}")
+    if name == DEFAULT_DEPLOYMENT:
+        app.include_router(chain_router)
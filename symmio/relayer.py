@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+from eth_account.signers.local import LocalAccount
+
+from chain import ChainClient
+from deposit_batcher import DEPOSIT_BATCH_SIZE, DepositBatcher
+from deposit_ledger import DepositLedger
+from deposit_pool import DepositPool
+from deposit_queue import DepositQueue
+from fees import FEE_STRATEGIES, FEE_STRATEGY
+from storage import Storage
+from submitter import DepositSubmitter
+from withdraw_indexer import WithdrawIndexer
+
+# requests of one deployment that may wait on its RPC at the same time
+CHAIN_CONCURRENCY = int(os.environ.get("CHAIN_CONCURRENCY", 32))
+
+
+class ChainRelayer:
+    """Everything the relayer runs for one deployment.
+
+    Each deployment has its own RPC client, nonces, deposit queue and
+    withdrawal index, so a slow chain only delays its own requests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deployment: dict,
+        account: LocalAccount,
+        storage: Storage,
+        deposit_pool: DepositPool,
+        withdraw_logger_abi: list,
+        deposit_executor_abi: list,
+        finality_blocks: int,
+    ):
+        self.name = name
+        self.finality_blocks = finality_blocks
+        self.client = ChainClient(
+            deployment["rpc"],
+            deployment["withdraw_logger_address"],
+            withdraw_logger_abi,
+            deployment["deposit_executor_address"],
+            deposit_executor_abi,
+            name=name,
+        )
+        self.storage = storage
+        self.ledger = DepositLedger(storage)
+        self.submitter = DepositSubmitter(
+            self.client.w3,
+            account,
+            self.client.deposit_executor,
+            FEE_STRATEGIES[deployment.get("fee_strategy", FEE_STRATEGY)](self.client),
+            name=name,
+        )
+        self.batcher = DepositBatcher(
+            self.submitter, deployment.get("deposit_batch_size", DEPOSIT_BATCH_SIZE)
+        )
+        self.queue = DepositQueue(
+            storage, self.ledger, deposit_pool, self.batcher, name=name
+        )
+        self.submitter.on_mined = self.queue.mined
+        self.indexer = WithdrawIndexer(
+            self.client.w3,
+            self.client.withdraw_logger,
+            storage,
+            finality_blocks,
+            start_block=deployment.get("start_block"),
+        )
+        self.limit = asyncio.Semaphore(CHAIN_CONCURRENCY)
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self.client.start()
+        self._tasks = [
+            asyncio.create_task(self.indexer.run()),
+            asyncio.create_task(self.queue.run()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.client.close()
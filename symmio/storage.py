@@ -0,0 +1,577 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from address_table import AddressTable
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+# seconds to wait for a free pooled connection
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# address table log entries that make the next insert rewrite the table
+ADDRESS_TABLE_LOG_MAX = int(os.environ.get("ADDRESS_TABLE_LOG_MAX", 100_000))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",  # better concurrency for reads
+    "PRAGMA synchronous=NORMAL;",  # WAL is still crash safe with NORMAL
+    "PRAGMA cache_size=-65536;",  # 64 MiB page cache per connection
+    "PRAGMA mmap_size=268435456;",  # 256 MiB
+    "PRAGMA temp_store=MEMORY;",
+)
+
+# Statements are kept as constants so that sqlite3's per-connection
+# statement cache hands back the already prepared statement.
+CREATE_SALTS = """
+    CREATE TABLE IF NOT EXISTS salts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        address TEXT NOT NULL UNIQUE COLLATE NOCASE
+    );
+"""
+CREATE_WITHDRAWALS = """
+    CREATE TABLE IF NOT EXISTS withdrawals (
+        chain_id INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        token TEXT NOT NULL,
+        amount TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        user TEXT NOT NULL,
+        block_number INTEGER NOT NULL,
+        PRIMARY KEY (chain_id, id)
+    ) WITHOUT ROWID;
+"""
+CREATE_WITHDRAWALS_BLOCK_INDEX = """
+    CREATE INDEX IF NOT EXISTS withdrawals_block ON withdrawals(block_number);
+"""
+# blocks the withdrawal index advanced to, newest last, to detect reorgs
+CREATE_INDEXED_BLOCKS = """
+    CREATE TABLE IF NOT EXISTS indexed_blocks (
+        number INTEGER PRIMARY KEY,
+        hash TEXT NOT NULL,
+        timestamp INTEGER NOT NULL
+    );
+"""
+# deposit txs seen by /deposit, keyed by keccak(tx)
+CREATE_DEPOSIT_TXS = """
+    CREATE TABLE IF NOT EXISTS deposit_txs (
+        digest BLOB PRIMARY KEY,
+        status TEXT NOT NULL,
+        tx_hash TEXT
+    ) WITHOUT ROWID;
+"""
+# deposits submitted on-chain, keyed like DepositExecutor.getDepositKey
+CREATE_DEPOSIT_KEYS = """
+    CREATE TABLE IF NOT EXISTS deposit_keys (
+        key BLOB PRIMARY KEY,
+        digest BLOB NOT NULL
+    ) WITHOUT ROWID;
+"""
+# deposit txs accepted by /deposit and not processed yet
+CREATE_DEPOSIT_JOBS = """
+    CREATE TABLE IF NOT EXISTS deposit_jobs (
+        digest BLOB PRIMARY KEY,
+        tx BLOB NOT NULL,
+        state TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        enqueued_at REAL NOT NULL,
+        run_at REAL NOT NULL,
+        error TEXT
+    ) WITHOUT ROWID;
+"""
+CREATE_DEPOSIT_JOBS_RUN_INDEX = """
+    CREATE INDEX IF NOT EXISTS deposit_jobs_run ON deposit_jobs(state, run_at);
+"""
+ADD_APT_ADDRESS = "ALTER TABLE salts ADD COLUMN apt_address TEXT"
+INSERT_ADDRESS = "INSERT OR IGNORE INTO salts(address) VALUES (?)"
+UPSERT_APT_ADDRESS = """
+    INSERT INTO salts(address, apt_address) VALUES (?, ?)
+    ON CONFLICT(address) DO UPDATE SET apt_address = excluded.apt_address
+    WHERE apt_address IS NULL
+"""
+SELECT_APT_ADDRESS = "SELECT apt_address FROM salts WHERE address = ?"
+ALL_APT_ADDRESSES = (
+    "SELECT address, apt_address FROM salts WHERE apt_address IS NOT NULL"
+)
+COUNT_APT_ADDRESSES = "SELECT COUNT(*) FROM salts WHERE apt_address IS NOT NULL"
+USERS_PAGE = "SELECT id, address FROM salts ORDER BY id LIMIT ? OFFSET ?"
+USERS_AFTER = "SELECT id, address FROM salts WHERE id > ? ORDER BY id LIMIT ?"
+USERS_SINCE = "SELECT id, address FROM salts WHERE id > ? ORDER BY id"
+INSERT_WITHDRAWAL = """
+    INSERT OR REPLACE INTO withdrawals
+    (chain_id, id, token, amount, destination, user, block_number)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_INDEXED_BLOCK = (
+    "INSERT OR REPLACE INTO indexed_blocks(number, hash, timestamp) VALUES (?, ?, ?)"
+)
+PRUNE_INDEXED_BLOCKS = "DELETE FROM indexed_blocks WHERE number < ?"
+RECENT_INDEXED_BLOCKS = (
+    "SELECT number, hash, timestamp FROM indexed_blocks ORDER BY number DESC LIMIT ?"
+)
+REWIND_WITHDRAWALS = "DELETE FROM withdrawals WHERE block_number > ?"
+REWIND_INDEXED_BLOCKS = "DELETE FROM indexed_blocks WHERE number > ?"
+COUNT_WITHDRAWALS = "SELECT COUNT(*) FROM withdrawals WHERE chain_id = ?"
+WITHDRAWALS_RANGE = """
+    SELECT id, token, amount, destination, user FROM withdrawals
+    WHERE chain_id = ? AND id >= ? AND id < ? ORDER BY id
+"""
+SELECT_DEPOSIT_TX = "SELECT status, tx_hash FROM deposit_txs WHERE digest = ?"
+SELECT_DEPOSIT_KEY = "SELECT 1 FROM deposit_keys WHERE key = ? AND digest != ?"
+UPSERT_DEPOSIT_TX = """
+    INSERT INTO deposit_txs(digest, status, tx_hash) VALUES (?, ?, ?)
+    ON CONFLICT(digest) DO UPDATE SET
+    status = excluded.status, tx_hash = excluded.tx_hash
+"""
+INSERT_DEPOSIT_KEY = "INSERT OR IGNORE INTO deposit_keys(key, digest) VALUES (?, ?)"
+UPDATE_DEPOSIT_TX_STATUS = "UPDATE deposit_txs SET status = ? WHERE digest = ?"
+UPDATE_DEPOSIT_TX_HASH = "UPDATE deposit_txs SET tx_hash = ? WHERE digest = ?"
+DELETE_DEPOSIT_TX = "DELETE FROM deposit_txs WHERE digest = ?"
+RELEASE_DEPOSIT_KEYS = "DELETE FROM deposit_keys WHERE digest = ?"
+INSERT_DEPOSIT_JOB = """
+    INSERT OR IGNORE INTO deposit_jobs(digest, tx, enqueued_at, run_at)
+    VALUES (?, ?, ?, ?)
+"""
+CLAIM_DEPOSIT_JOBS = """
+    UPDATE deposit_jobs SET state = 'running', attempts = attempts + 1
+    WHERE digest IN (
+        SELECT digest FROM deposit_jobs
+        WHERE state = 'queued' AND run_at <= ?
+        ORDER BY run_at LIMIT ?
+    )
+    RETURNING digest, tx, attempts, enqueued_at
+"""
+DELETE_DEPOSIT_JOB = "DELETE FROM deposit_jobs WHERE digest = ?"
+RETRY_DEPOSIT_JOB = """
+    UPDATE deposit_jobs SET state = ?, run_at = ?, error = ? WHERE digest = ?
+"""
+SUBMIT_DEPOSIT_JOB = "UPDATE deposit_jobs SET state = 'submitted' WHERE digest = ?"
+RECOVER_DEPOSIT_JOBS = """
+    UPDATE deposit_jobs SET state = 'queued' WHERE state IN ('running', 'submitted')
+"""
+SELECT_DEPOSIT_JOB_STATE = "SELECT state FROM deposit_jobs WHERE digest = ?"
+DEPOSIT_JOBS_STATS = """
+    SELECT state, COUNT(*), MIN(enqueued_at) FROM deposit_jobs GROUP BY state
+"""
+
+MAX_PAGE_CURSORS = 1024
+# what /users and the user index read back as a salt
+SALT_ADDRESS = re.compile(r"0x[0-9a-f]+")
+# how many indexed heads are kept to find the common ancestor after a reorg
+INDEXED_BLOCKS_KEPT = 128
+
+
+def valid_salt_address(address: str) -> bool:
+    """Whether `address` can be stored as a user, printed if it can't."""
+    if SALT_ADDRESS.fullmatch(address):
+        return True
+    print(f"Not storing {address!r}, it is not a hex salt")
+    return False
+
+
+class UserIndex:
+    """Salt -> user id of every user in the salts table, in memory.
+
+    Salts are keyed as ints, the same as /users reports them, and a user's
+    id is its position in the table, also as in /users. Rows are only ever
+    appended, so the index catches up by reading the rows after the last
+    one it has seen. That happens after every insert of this process, rows
+    added by another process show up with its next insert.
+    """
+
+    def __init__(self):
+        self._ids: dict[int, int] = {}
+        # rows seen, the table can hold one salt under two spellings
+        self._count = 0
+        self._last_row = 0
+        # rows whose address is not a salt, they keep their position
+        self.invalid = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, salt: int) -> int | None:
+        return self._ids.get(salt)
+
+    def catch_up(self, con: sqlite3.Connection) -> None:
+        cur = con.execute(USERS_SINCE, (self._last_row,))
+        while rows := cur.fetchmany(10_000):
+            try:
+                salts = [int(address, 0) for _, address in rows]
+            except ValueError:
+                self._add_checked(rows)
+            else:
+                positions = range(self._count, self._count + len(rows))
+                self._ids.update(zip(salts, positions))
+            self._count += len(rows)
+            self._last_row = rows[-1][0]
+
+    def _add_checked(self, rows: list[tuple[int, str]]) -> None:
+        for position, (row, address) in enumerate(rows, self._count):
+            try:
+                self._ids[int(address, 0)] = position
+            except ValueError:
+                self.invalid += 1
+                print(f"Skipping salts row {row}, {address!r} is not a salt")
+
+
+class Storage:
+    """Owns a bounded pool of long-lived connections to the relayer DB."""
+
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = DB_POOL_SIZE,
+        address_table: str | None = None,
+    ):
+        self.path = path
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        # Rows are never deleted and new rows always get a larger id, so the
+        # id of the last user on a page stays valid. The custody service walks
+        # the pages in order, which lets the next page continue from that id
+        # instead of an OFFSET.
+        self._page_cursors: dict[int, int] = {}
+        self._cursors_lock = threading.Lock()
+        self.users = UserIndex()
+        # held across an insert and the index catching up with it
+        self._users_lock = threading.Lock()
+        # deposit address -> (user id, chain) of the users, kept in this file
+        self.address_table_path = address_table
+        self.addresses: AddressTable | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(
+            self.path, timeout=10, check_same_thread=False, cached_statements=256
+        )
+        for pragma in PRAGMAS:
+            con.execute(pragma)
+        return con
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise sqlite3.OperationalError("no free database connection")
+        try:
+            try:
+                con = self._pool.get_nowait()
+            except queue.Empty:
+                con = self._connect()
+            try:
+                yield con
+                con.commit()
+            except BaseException:
+                con.rollback()
+                raise
+            finally:
+                self._pool.put(con)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        if self.addresses is not None:
+            self.addresses.close()
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def init(self) -> None:
+        """Create DB + salts table if missing."""
+        with self.connection() as con:
+            con.execute(CREATE_SALTS)
+            con.execute(CREATE_WITHDRAWALS)
+            con.execute(CREATE_WITHDRAWALS_BLOCK_INDEX)
+            con.execute(CREATE_INDEXED_BLOCKS)
+            con.execute(CREATE_DEPOSIT_TXS)
+            con.execute(CREATE_DEPOSIT_KEYS)
+            con.execute(CREATE_DEPOSIT_JOBS)
+            con.execute(CREATE_DEPOSIT_JOBS_RUN_INDEX)
+            columns = {row[1] for row in con.execute("PRAGMA table_info(salts)")}
+            if "apt_address" not in columns:
+                con.execute(ADD_APT_ADDRESS)
+        with self._users_lock, self.connection() as con:
+            self.users.catch_up(con)
+        if self.address_table_path is not None:
+            self._load_address_table()
+
+    def _load_address_table(self) -> None:
+        path = self.address_table_path
+        if os.path.exists(path):
+            self.addresses = AddressTable.load(path)
+        else:
+            self.addresses = AddressTable()
+        # the table misses addresses stored before there was one, or stored
+        # by a process that stopped before appending them
+        with self.connection() as con:
+            (stored,) = con.execute(COUNT_APT_ADDRESSES).fetchone()
+            if stored == len(self.addresses) and os.path.exists(path):
+                return
+            missing = [
+                (address, apt_address)
+                for address, apt_address in con.execute(ALL_APT_ADDRESSES)
+                if self.addresses.get(apt_address) is None
+            ]
+        if missing:
+            print(f"Adding {len(missing)} stored addresses to the address table")
+        self._add_apt_addresses(missing)
+        self.addresses.save(path)
+
+    def _add_apt_addresses(self, rows: list[tuple[str, str]]) -> None:
+        """Add (salt address, Aptos address) rows of known users to the table."""
+        entries = []
+        for address, apt_address in rows:
+            if SALT_ADDRESS.fullmatch(address):
+                user_id = self.users.get(int(address, 16))
+                if user_id is not None:
+                    entries.append((user_id, apt_address))
+        self.addresses.add_many("APT", entries)
+
+    def insert_eth_addresses(self, addresses: list[str]) -> None:
+        """
+        Insert unique (case-insensitive) ETH addresses into salts.
+        Uses INSERT OR IGNORE so existing rows are left untouched.
+        """
+        if not addresses:
+            return
+        normalized = {a.lower() for a in addresses}  # dedupe before hitting the DB
+        normalized = {a for a in normalized if valid_salt_address(a)}
+        with self._users_lock:
+            with self.connection() as con:
+                con.executemany(INSERT_ADDRESS, [(a,) for a in normalized])
+            # after the commit, so the index never has a row that rolled back
+            with self.connection() as con:
+                self.users.catch_up(con)
+
+    def get_apt_addresses(self, addresses: list[str]) -> dict[str, str]:
+        """Return the stored Aptos address of every known ETH address."""
+        found: dict[str, str] = {}
+        with self.connection() as con:
+            for address in addresses:
+                row = con.execute(SELECT_APT_ADDRESS, (address,)).fetchone()
+                if row is not None and row[0] is not None:
+                    found[address] = row[0]
+        return found
+
+    def insert_apt_addresses(self, apt_addresses: dict[str, str]) -> None:
+        """Insert ETH addresses together with their derived Aptos address."""
+        rows = [
+            (a.lower(), apt)
+            for a, apt in apt_addresses.items()
+            if valid_salt_address(a.lower())
+        ]
+        if not rows:
+            return
+        with self._users_lock:
+            with self.connection() as con:
+                con.executemany(UPSERT_APT_ADDRESS, rows)
+            with self.connection() as con:
+                self.users.catch_up(con)
+            if self.addresses is not None:
+                self._add_apt_addresses(rows)
+                if self.addresses.logged > ADDRESS_TABLE_LOG_MAX:
+                    self.addresses.save(self.address_table_path)
+                else:
+                    self.addresses.append(self.address_table_path)
+
+    def count_users(self) -> int:
+        return len(self.users)
+
+    def find_users(self, salts: list[str]) -> dict[str, int]:
+        """Return the user id of every salt that belongs to a user.
+
+        Salts are hex strings, with or without 0x, e.g. `Deposit.salt`.
+        """
+        found: dict[str, int] = {}
+        for salt in salts:
+            user_id = self.users.get(int(salt, 16))
+            if user_id is not None:
+                found[salt] = user_id
+        return found
+
+    def find_addresses(self, addresses: list[str]) -> dict[str, tuple[int, str]]:
+        """Return (user id, chain) of every address that is a deposit address
+        of a user."""
+        if self.addresses is None:
+            raise LookupError("no address table is kept")
+        found: dict[str, tuple[int, str]] = {}
+        for address in addresses:
+            hit = self.addresses.get(address)
+            if hit is not None:
+                found[address] = hit
+        return found
+
+    def fetch_users(self, offset: int, limit: int) -> list[str]:
+        """Return the addresses of the users at positions [offset, offset+limit)."""
+        after_id = self._page_cursors.get(offset)
+        with self.connection() as con:
+            if after_id is None:
+                rows = con.execute(USERS_PAGE, (limit, offset)).fetchall()
+            else:
+                rows = con.execute(USERS_AFTER, (after_id, limit)).fetchall()
+        if rows:
+            with self._cursors_lock:
+                if len(self._page_cursors) >= MAX_PAGE_CURSORS:
+                    self._page_cursors.pop(next(iter(self._page_cursors)))
+                self._page_cursors[offset + len(rows)] = rows[-1][0]
+        return [address for _, address in rows]
+
+    def iter_users(self, batch_size: int) -> Iterator[list[str]]:
+        """Yield the addresses of all users in order, `batch_size` at a time.
+
+        Each batch is read with its own connection, which goes back to the
+        pool before the batch is yielded.
+        """
+        after_id = 0
+        while True:
+            with self.connection() as con:
+                rows = con.execute(USERS_AFTER, (after_id, batch_size)).fetchall()
+            if not rows:
+                return
+            yield [address for _, address in rows]
+            after_id = rows[-1][0]
+
+    def add_withdrawals(
+        self,
+        withdrawals: list[tuple],
+        block_number: int,
+        block_hash: str,
+        timestamp: int,
+    ) -> None:
+        """Store indexed withdrawals and advance the index head atomically.
+
+        `withdrawals` holds (chain_id, id, token, amount, destination, user,
+        block_number) tuples.
+        """
+        with self.connection() as con:
+            con.executemany(INSERT_WITHDRAWAL, withdrawals)
+            con.execute(INSERT_INDEXED_BLOCK, (block_number, block_hash, timestamp))
+            con.execute(PRUNE_INDEXED_BLOCKS, (block_number - INDEXED_BLOCKS_KEPT,))
+
+    def recent_indexed_blocks(self) -> list[tuple[int, str, int]]:
+        """Return (number, hash, timestamp) of the latest index heads, newest first."""
+        with self.connection() as con:
+            return con.execute(RECENT_INDEXED_BLOCKS, (INDEXED_BLOCKS_KEPT,)).fetchall()
+
+    def rewind_withdrawals(self, block_number: int) -> None:
+        """Drop everything indexed after `block_number`."""
+        with self.connection() as con:
+            con.execute(REWIND_WITHDRAWALS, (block_number,))
+            con.execute(REWIND_INDEXED_BLOCKS, (block_number,))
+
+    def count_withdrawals(self, chain_id: int) -> int:
+        with self.connection() as con:
+            (count,) = con.execute(COUNT_WITHDRAWALS, (chain_id,)).fetchone()
+        return int(count)
+
+    def get_withdrawals(self, chain_id: int, start: int, end: int) -> list[tuple]:
+        """Return (id, token, amount, destination, user) for ids in [start, end)."""
+        with self.connection() as con:
+            return con.execute(WITHDRAWALS_RANGE, (chain_id, start, end)).fetchall()
+
+    def get_deposit_txs(self, digests: list[bytes]) -> dict[bytes, tuple[str, str]]:
+        """Return (status, tx_hash) of every known deposit tx digest."""
+        found: dict[bytes, tuple[str, str]] = {}
+        with self.connection() as con:
+            for digest in digests:
+                row = con.execute(SELECT_DEPOSIT_TX, (digest,)).fetchone()
+                if row is not None:
+                    found[digest] = row
+        return found
+
+    def get_used_deposit_keys(
+        self, keys: list[bytes], digest: bytes = b""
+    ) -> set[bytes]:
+        """Return the keys submitted by a tx other than `digest`."""
+        with self.connection() as con:
+            return {
+                key
+                for key in keys
+                if con.execute(SELECT_DEPOSIT_KEY, (key, digest)).fetchone() is not None
+            }
+
+    def add_deposit_tx(
+        self,
+        digest: bytes,
+        status: str,
+        tx_hash: str | None = None,
+        keys: list[bytes] = (),
+    ) -> None:
+        """Record a deposit tx and, once submitted, the deposits it carries."""
+        with self.connection() as con:
+            con.execute(UPSERT_DEPOSIT_TX, (digest, status, tx_hash))
+            con.executemany(INSERT_DEPOSIT_KEY, [(key, digest) for key in keys])
+
+    def set_deposit_tx_status(self, digest: bytes, status: str, release: bool) -> None:
+        """Update a submitted tx, `release` frees its deposit keys."""
+        with self.connection() as con:
+            if release:
+                con.execute(RELEASE_DEPOSIT_KEYS, (digest,))
+            con.execute(UPDATE_DEPOSIT_TX_STATUS, (status, digest))
+
+    def set_deposit_tx_hash(self, digest: bytes, tx_hash: str) -> None:
+        with self.connection() as con:
+            con.execute(UPDATE_DEPOSIT_TX_HASH, (tx_hash, digest))
+
+    def remove_deposit_tx(self, digest: bytes) -> None:
+        """Forget a tx and free its deposit keys."""
+        with self.connection() as con:
+            con.execute(RELEASE_DEPOSIT_KEYS, (digest,))
+            con.execute(DELETE_DEPOSIT_TX, (digest,))
+
+    def enqueue_deposit_jobs(self, jobs: list[tuple[bytes, bytes]], now: float) -> None:
+        """Queue (digest, tx) pairs, txs that are queued already are ignored."""
+        with self.connection() as con:
+            con.executemany(
+                INSERT_DEPOSIT_JOB, [(digest, tx, now, now) for digest, tx in jobs]
+            )
+
+    def claim_deposit_jobs(self, limit: int, now: float) -> list[tuple]:
+        """Mark up to `limit` due jobs as running.
+
+        Returns (digest, tx, attempts, enqueued_at) tuples.
+        """
+        with self.connection() as con:
+            return con.execute(CLAIM_DEPOSIT_JOBS, (now, limit)).fetchall()
+
+    def submit_deposit_job(self, digest: bytes) -> None:
+        """Keep a job as submitted until its receipt finishes or retries it."""
+        with self.connection() as con:
+            con.execute(SUBMIT_DEPOSIT_JOB, (digest,))
+
+    def finish_deposit_job(self, digest: bytes) -> None:
+        with self.connection() as con:
+            con.execute(DELETE_DEPOSIT_JOB, (digest,))
+
+    def retry_deposit_job(
+        self, digest: bytes, run_at: float | None, error: str
+    ) -> None:
+        """Run the job again at `run_at`, or park it as failed if None."""
+        state = "failed" if run_at is None else "queued"
+        with self.connection() as con:
+            con.execute(RETRY_DEPOSIT_JOB, (state, run_at or 0, error, digest))
+
+    def recover_deposit_jobs(self) -> int:
+        """Requeue the jobs a previous process was running or waiting on a
+        receipt for when it stopped."""
+        with self.connection() as con:
+            return con.execute(RECOVER_DEPOSIT_JOBS).rowcount
+
+    def get_deposit_job_states(self, digests: list[bytes]) -> dict[bytes, str]:
+        found: dict[bytes, str] = {}
+        with self.connection() as con:
+            for digest in digests:
+                row = con.execute(SELECT_DEPOSIT_JOB_STATE, (digest,)).fetchone()
+                if row is not None:
+                    found[digest] = row[0]
+        return found
+
+    def deposit_job_stats(self) -> dict[str, tuple[int, float]]:
+        """Return state -> (job count, oldest enqueued_at)."""
+        with self.connection() as con:
+            return {
+                state: (count, oldest)
+                for state, count, oldest in con.execute(DEPOSIT_JOBS_STATS)
+            }
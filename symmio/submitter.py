@@ -0,0 +1,287 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+from web3.exceptions import TransactionNotFound
+from web3.logs import DISCARD
+
+from fees import (
+    MAX_FEE_BUMPS,
+    FeeStrategy,
+    GasEstimates,
+    bump_fees,
+    deposits_shape,
+)
+from metrics import DEPOSIT_STAGE_SECONDS
+from parse_deposit import HEADER
+
+# max number of executeDeposit txs broadcast but not yet mined
+SUBMIT_WINDOW = int(os.environ.get("SUBMIT_WINDOW", 16))
+# seconds to wait for a receipt before replacing the tx with a higher fee
+REPLACE_AFTER = float(os.environ.get("REPLACE_AFTER", 60))
+RECEIPT_POLL_INTERVAL = 1.0
+# longest wait between receipt polls while the node keeps failing
+RECEIPT_RETRY_MAX = float(os.environ.get("RECEIPT_RETRY_MAX", 30))
+
+
+class NonceManager:
+    """Hands out sequential nonces without a round trip per transaction."""
+
+    def __init__(self, w3: AsyncWeb3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._next: int | None = None
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        async with self._lock:
+            if self._next is None:
+                self._next = await self.w3.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    async def reset(self) -> None:
+        """Resync from the node on the next call, e.g. after a failed send."""
+        async with self._lock:
+            self._next = None
+
+
+@dataclass
+class PendingTx:
+    nonce: int
+    tx: dict
+    deposit_txs: list[bytes]
+    shape: tuple[int, int, int]
+    tx_hashes: list[HexBytes] = field(default_factory=list)
+    submitted_at: float = 0.0
+    sent_at: float = 0.0
+    # out of fee bumps, left to be mined at its last fees
+    capped: bool = False
+
+
+class DepositSubmitter:
+    """Broadcasts executeDeposit(s) txs back to back and confirms them in the
+    background.
+
+    Fees come from `fees` and gas limits from `gas`, which estimates every
+    tx with a floor per calldata shape. Up to `window` txs can be in
+    flight. A tx that is not mined within `replace_after` seconds is
+    replaced with the same nonce and bumped fees. `on_mined` is called in
+    a thread with the submitted deposit txs and whether each of them went
+    through.
+    """
+
+    def __init__(
+        self,
+        w3: AsyncWeb3,
+        account: LocalAccount,
+        executor: AsyncContract,
+        fees: FeeStrategy,
+        gas: GasEstimates | None = None,
+        window: int = SUBMIT_WINDOW,
+        replace_after: float = REPLACE_AFTER,
+        on_mined: Callable[[list[bytes], list[bool]], None] | None = None,
+        name: str = "",
+    ):
+        self.name = name
+        self.w3 = w3
+        self.account = account
+        self.executor = executor
+        self.fees = fees
+        self.gas = gas or GasEstimates()
+        self._chain_id: int | None = None
+        self.replace_after = replace_after
+        self.on_mined = on_mined
+        self.nonces = NonceManager(w3, account.address)
+        self._window = asyncio.Semaphore(window)
+        self._confirmations: set[asyncio.Task] = set()
+        self.mined_txs = 0
+        self.mined_deposits = 0
+        self.gas_used = 0
+        self.fees_paid = 0
+        self.time_to_mine = 0.0
+
+    async def submit(self, deposit_txs: list[bytes]) -> HexBytes:
+        """Broadcast one tx executing `deposit_txs` and return its hash.
+
+        Several txs go through executeDeposits, a single one through
+        executeDeposit, which every deployed executor has.
+        """
+        await self._window.acquire()
+        nonce = None
+        try:
+            if len(deposit_txs) == 1:
+                call = self.executor.functions.executeDeposit(deposit_txs[0])
+            else:
+                call = self.executor.functions.executeDeposits(deposit_txs)
+            shape = deposits_shape(deposit_txs)
+            gas = await self.gas.gas(shape, lambda: self._estimate_gas(call))
+            fees = await self.fees.fees()
+            if self._chain_id is None:
+                self._chain_id = await self.w3.eth.chain_id
+            nonce = await self.nonces.next()
+            # everything is filled in, so building does not hit the node
+            tx = await call.build_transaction(
+                {
+                    "from": self.account.address,
+                    "chainId": self._chain_id,
+                    "nonce": nonce,
+                    "gas": gas,
+                    **fees,
+                }
+            )
+            pending = PendingTx(
+                nonce=nonce, tx=tx, deposit_txs=deposit_txs, shape=shape
+            )
+            await self._send(pending)
+        except Exception:
+            if nonce is not None:
+                await self.nonces.reset()
+            self._window.release()
+            raise
+
+        task = asyncio.create_task(self._confirm(pending))
+        self._confirmations.add(task)
+        task.add_done_callback(self._confirmations.discard)
+        return pending.tx_hashes[-1]
+
+    @property
+    def pending(self) -> int:
+        """Number of broadcast txs waiting to be mined."""
+        return len(self._confirmations)
+
+    async def drain(self) -> None:
+        """Wait until every broadcast tx has been mined."""
+        await asyncio.gather(*self._confirmations, return_exceptions=True)
+
+    async def _estimate_gas(self, call) -> int:
+        with DEPOSIT_STAGE_SECONDS.time(self.name, "gas_estimate"):
+            return await call.estimate_gas({"from": self.account.address})
+
+    async def _send(self, pending: PendingTx) -> None:
+        with DEPOSIT_STAGE_SECONDS.time(self.name, "broadcast"):
+            signed_tx = self.account.sign_transaction(pending.tx)
+            tx_hash = await self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        if not pending.tx_hashes:
+            pending.submitted_at = time.monotonic()
+        pending.tx_hashes.append(tx_hash)
+        pending.sent_at = time.monotonic()
+        print(f"Transaction sent: {tx_hash.hex()} (nonce {pending.nonce})")
+
+    async def _replace(self, pending: PendingTx) -> None:
+        try:
+            fees = None
+            # the first hash is the original tx
+            if len(pending.tx_hashes) <= MAX_FEE_BUMPS:
+                fees = bump_fees(pending.tx, await self.fees.fees())
+            if fees is None:
+                print(f"Nonce {pending.nonce} reached the fee cap, not replacing it")
+                pending.capped = True
+                return
+            pending.tx.update(fees)
+            await self._send(pending)
+        except Exception as e:
+            # most likely one of the earlier txs was mined in the meantime,
+            # otherwise the replacement is tried again after replace_after
+            print(f"Replacing nonce {pending.nonce} failed: {e}")
+            pending.sent_at = time.monotonic()
+
+    async def _receipt(self, pending: PendingTx):
+        for tx_hash in pending.tx_hashes:
+            try:
+                return await self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+
+    def _results(self, pending: PendingTx, receipt) -> list[bool]:
+        """Whether each deposit tx of a mined tx went through."""
+        if receipt.status == 0:
+            return [False] * len(pending.deposit_txs)
+        results = [True] * len(pending.deposit_txs)
+        if len(pending.deposit_txs) > 1:
+            # the receipt has the logs of the deposits too
+            failed = self.executor.events.DepositTxFailed().process_receipt(
+                receipt, errors=DISCARD
+            )
+            for event in failed:
+                print(f"Deposit tx {event.args.index} of the batch failed")
+                results[event.args.index] = False
+        return results
+
+    def _record(self, pending: PendingTx, receipt) -> None:
+        self.mined_txs += 1
+        self.mined_deposits += sum(
+            HEADER.unpack_from(tx)[5] for tx in pending.deposit_txs
+        )
+        self.gas_used += receipt.gasUsed
+        self.fees_paid += receipt.gasUsed * receipt.effectiveGasPrice
+        time_to_mine = time.monotonic() - pending.submitted_at
+        self.time_to_mine += time_to_mine
+        DEPOSIT_STAGE_SECONDS.observe(time_to_mine, self.name, "receipt")
+
+    def stats(self) -> dict:
+        """Cost per deposit and time from broadcast to receipt."""
+        mined_txs = self.mined_txs or 1
+        mined_deposits = self.mined_deposits or 1
+        return {
+            "mined_txs": self.mined_txs,
+            "mined_deposits": self.mined_deposits,
+            "gas_per_deposit": self.gas_used / mined_deposits,
+            "fee_per_deposit": self.fees_paid / mined_deposits,
+            "time_to_mine": self.time_to_mine / mined_txs,
+        }
+
+    async def _confirm(self, pending: PendingTx):
+        errors = 0
+        try:
+            while True:
+                try:
+                    receipt = await self._receipt(pending)
+                except Exception as e:
+                    # the tx is still out there, keep polling until it is mined
+                    errors += 1
+                    delay = min(RECEIPT_POLL_INTERVAL * 2**errors, RECEIPT_RETRY_MAX)
+                    print(
+                        f"Receipt of nonce {pending.nonce} not fetched,"
+                        f" retrying in {delay}s: {e}"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                errors = 0
+                if receipt is not None:
+                    print(
+                        f"Transaction {receipt.transactionHash.hex()} mined "
+                        f"in block {receipt.blockNumber}"
+                    )
+                    self._record(pending, receipt)
+                    if receipt.status == 0 and receipt.gasUsed >= pending.tx["gas"]:
+                        # ran out of gas, give this shape more from now on
+                        self.gas.ran_out(pending.shape, pending.tx["gas"])
+                    if self.on_mined is not None:
+                        try:
+                            await asyncio.to_thread(
+                                self.on_mined,
+                                pending.deposit_txs,
+                                self._results(pending, receipt),
+                            )
+                        except Exception as e:
+                            print(f"Recording receipt failed: {e}")
+                    return receipt
+                if (
+                    not pending.capped
+                    and time.monotonic() - pending.sent_at > self.replace_after
+                ):
+                    await self._replace(pending)
+                await asyncio.sleep(RECEIPT_POLL_INTERVAL)
+        finally:
+            self._window.release()
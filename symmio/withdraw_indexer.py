@@ -0,0 +1,129 @@
+import asyncio
+import os
+
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+
+from storage import Storage
+
+WITHDRAW_INDEX_POLL_INTERVAL = float(os.environ.get("WITHDRAW_INDEX_POLL_INTERVAL", 2))
+# max block range per eth_getLogs call, public nodes usually cap it
+WITHDRAW_INDEX_BATCH_BLOCKS = int(os.environ.get("WITHDRAW_INDEX_BATCH_BLOCKS", 2000))
+
+
+class WithdrawIndexer:
+    """Follows WithdrawalLogged events into the local withdrawals table.
+
+    Indexing starts at `start_block`, or at the block the contract was
+    deployed in if None. Only blocks up to `finality_blocks` behind the
+    head are indexed. Each poll first checks that the last indexed block is
+    still on the chain and rewinds to the newest stored head that is, if it
+    is not.
+    """
+
+    def __init__(
+        self,
+        w3: AsyncWeb3,
+        contract: AsyncContract,
+        storage: Storage,
+        finality_blocks: int,
+        start_block: int | None = None,
+        poll_interval: float = WITHDRAW_INDEX_POLL_INTERVAL,
+        batch_blocks: int = WITHDRAW_INDEX_BATCH_BLOCKS,
+    ):
+        self.w3 = w3
+        self.contract = contract
+        self.storage = storage
+        self.finality_blocks = finality_blocks
+        self.start_block = start_block
+        self.poll_interval = poll_interval
+        self.batch_blocks = batch_blocks
+        # timestamp of the block the index is synced to, None while catching up
+        self.head_timestamp: int | None = None
+
+    @property
+    def synced(self) -> bool:
+        return self.head_timestamp is not None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Withdraw indexer error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _deployment_block(self, head: int) -> int:
+        """The first block with the contract's code, a binary search."""
+        low, high = 0, head
+        while low < high:
+            middle = (low + high) // 2
+            code = await self.w3.eth.get_code(
+                self.contract.address, block_identifier=middle
+            )
+            if code:
+                high = middle
+            else:
+                low = middle + 1
+        print(f"Withdraw logger deployed in block {low}, indexing from there")
+        return low
+
+    async def _find_common_head(self) -> tuple[int, str, int] | None:
+        heads = await asyncio.to_thread(self.storage.recent_indexed_blocks)
+        for number, block_hash, timestamp in heads:
+            block = await self.w3.eth.get_block(number)
+            if block["hash"].to_0x_hex() == block_hash:
+                if number != heads[0][0]:
+                    print(f"Reorg detected, rewinding withdraw index to {number}")
+                    # not served from the index until it caught up again
+                    self.head_timestamp = None
+                    await asyncio.to_thread(self.storage.rewind_withdrawals, number)
+                return number, block_hash, timestamp
+        if heads:
+            # deeper than the stored heads, index again from scratch
+            print("Reorg below the stored heads, reindexing withdrawals")
+            self.head_timestamp = None
+            await asyncio.to_thread(self.storage.rewind_withdrawals, -1)
+        return None
+
+    async def sync(self) -> None:
+        """Index every finalized block that is not indexed yet."""
+        target = await self.w3.eth.block_number - self.finality_blocks
+        head = await self._find_common_head()
+        if head:
+            from_block = head[0] + 1
+        else:
+            if self.start_block is None:
+                self.start_block = await self._deployment_block(target)
+            from_block = self.start_block
+        if head and head[0] >= target:
+            self.head_timestamp = head[2]
+
+        while from_block <= target:
+            to_block = min(target, from_block + self.batch_blocks - 1)
+            logs = await self.contract.events.WithdrawalLogged.get_logs(
+                from_block=from_block, to_block=to_block
+            )
+            block = await self.w3.eth.get_block(to_block)
+            withdrawals = [
+                (
+                    log.args.chainId,
+                    log.args.id,
+                    "0x" + log.args.token.hex(),
+                    str(log.args.amount),
+                    "0x" + log.args.destination.hex(),
+                    log.args.user,
+                    log.blockNumber,
+                )
+                for log in logs
+            ]
+            await asyncio.to_thread(
+                self.storage.add_withdrawals,
+                withdrawals,
+                to_block,
+                block["hash"].to_0x_hex(),
+                block["timestamp"],
+            )
+            from_block = to_block + 1
+            if to_block == target:
+                self.head_timestamp = block["timestamp"]
@@ -1,10 +1,11 @@
+import os
+import time
 from struct import unpack
 from typing import Any
 
-from eth_account.messages import encode_defunct
-from frost_lib.curves import secp256k1_evm as curve
+import secp256k1
+from eth_hash.auto import keccak
 from pydantic import BaseModel
-from web3 import Web3
 
 
 class FROSTVerificationError(Exception):
@@ -15,6 +16,7 @@ class ECDSAVerificationError(Exception):
     pass
 
 
+# no longer raised since the FROST curve is built in, kept for importers
 class DepositChainNotFound(Exception):
     pass
 
@@ -37,34 +39,37 @@ KEY = VerifyingData(
 
 deposit_shield_address = "0x786bd69517Bc30eE2fC13FeDA8B1aE0e6feDbad6"
 
+# secp256k1 group order, see SchnorrSECP256K1Verifier.sol
+Q = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+HALF_Q = (Q >> 1) + 1
+
+_ecdsa = secp256k1.PublicKey()
+
+# JSON of a VerifyingData that replaces KEY, re-read when the file changes
+FROST_KEY_FILE = os.environ.get("FROST_KEY_FILE")
+FROST_KEY_CHECK_INTERVAL = float(os.environ.get("FROST_KEY_CHECK_INTERVAL", 5))
+
 
 def verify_deposit_tx(tx: bytes) -> bool:
     """Verify deposit transaction."""
     msg = tx[:-129]
     frost_sig, ecdsa_sig = unpack(">64s 65s", tx[-129:])
 
-    chain = msg[2:5]
-    chain = chain.upper().decode()
-
-    if curve is None:
-        raise DepositChainNotFound()
-
     # Verify FROST signature
+    frost_verifier.maybe_reload()
     try:
-        frost_verified = curve.verify_group_signature(
-            frost_sig.hex(),
-            msg,
-            KEY,
-        )
+        frost_verified = frost_verifier.verify(msg, frost_sig)
     except ValueError as e:
         print(f"FROST signature verification failed: {e}")
         raise FROSTVerificationError()
 
-    # Verify ECDSA signature
+    # Verify ECDSA signature, eth_account alone takes over a second to import
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+
     try:
         eth_signed_message = encode_defunct(tx[:-129])
-        w3 = Web3()
-        recovered_address = w3.eth.account.recover_message(
+        recovered_address = Account.recover_message(
             eth_signed_message, signature=ecdsa_sig
         )
         ecdsa_verified = recovered_address.lower() == deposit_shield_address.lower()
@@ -75,6 +80,138 @@ def verify_deposit_tx(tx: bytes) -> bool:
     return frost_verified and ecdsa_verified
 
 
+def _ecrecover(msg_hash: bytes, signature: bytes, recid: int) -> bytes:
+    """Return the address recovered from a 64-byte r||s signature."""
+    sig = _ecdsa.ecdsa_recoverable_deserialize(signature, recid)
+    pubkey = secp256k1.PublicKey(_ecdsa.ecdsa_recover(msg_hash, sig, raw=True))
+    return keccak(pubkey.serialize(compressed=False)[1:])[12:]
+
+
+class FrostVerifier:
+    """Verifies FROST signatures against a group key decoded once.
+
+    Everything that only depends on the key is computed in `load`, a
+    verification is then one ecrecover and two keccaks. With `key_file`
+    set the key is reloaded when the file changes, which also reaches the
+    deposit pool workers since each of them checks the file itself.
+    """
+
+    def __init__(self, key: VerifyingData, key_file: str | None = None):
+        self.key_file = key_file
+        self._mtime: int | None = None
+        self._checked = float("-inf")
+        self.load(key)
+        self.maybe_reload()
+
+    def load(self, key: VerifyingData) -> None:
+        pubkey = bytes.fromhex(key.verifying_key)
+        if len(pubkey) != 33 or pubkey[0] not in (2, 3):
+            raise ValueError("verifying key must be a compressed point")
+        x = int.from_bytes(pubkey[1:], "big")
+        if not 0 < x < HALF_Q:
+            # same restriction as SchnorrSECP256K1Verifier
+            raise ValueError("verifying key x must be below half the group order")
+        parity = pubkey[0] - 2
+        # the part of the challenge preimage that follows addr(R)
+        challenge_key = bytes([27 + parity]) + pubkey[1:]
+        # replaced in one assignment, a verify sees either the old or new key
+        self._state = (pubkey[1:], parity, x, challenge_key)
+        self.key = key
+
+    def maybe_reload(self) -> None:
+        """Load `key_file` if it changed, at most every FROST_KEY_CHECK_INTERVAL."""
+        if self.key_file is None:
+            return
+        now = time.monotonic()
+        if now - self._checked < FROST_KEY_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.key_file).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.key_file) as f:
+                self.load(VerifyingData.model_validate_json(f.read()))
+        except (OSError, ValueError) as e:
+            print(f"Loading FROST key from {self.key_file} failed: {e}")
+            return
+        self._mtime = mtime
+        print(f"Loaded FROST key {self.key.verifying_key}")
+
+    def verify(self, msg: bytes, frost_sig: bytes) -> bool:
+        """Verify the FROST signature the same way SchnorrSECP256K1Verifier does.
+
+        The signature is (e, s) and commits to the address of the nonce
+        point, so ecrecover(-s*x, parity, x, -e*x) gives us s*G - e*PK in a
+        single multi-scalar multiplication.
+        """
+        key_x, parity, x, challenge_key = self._state
+        e = int.from_bytes(frost_sig[:32], "big")
+        s = int.from_bytes(frost_sig[32:], "big")
+        if not 0 < s < Q:
+            return False
+
+        nonce_address = _ecrecover(
+            (-s * x % Q).to_bytes(32, "big"),
+            key_x + (-e * x % Q).to_bytes(32, "big"),
+            parity,
+        )
+        challenge = keccak(nonce_address + challenge_key + keccak(msg))
+        return challenge == frost_sig[:32]
+
+
+frost_verifier = FrostVerifier(KEY, FROST_KEY_FILE)
+
+
+def _verify_ecdsa_signature(msg: bytes, ecdsa_sig: bytes, shield: bytes) -> bool:
+    v = ecdsa_sig[64]
+    if v >= 27:
+        v -= 27
+    if v not in (0, 1):
+        return False
+    msg_hash = keccak(b"\x19Ethereum Signed Message:\n" + str(len(msg)).encode() + msg)
+    return _ecrecover(msg_hash, ecdsa_sig[:64], v) == shield
+
+
+def verify_deposit_txs(
+    txs: list[bytes], timings: dict[str, list[float]] | None = None
+) -> list[bool]:
+    """Verify a batch of deposit transactions.
+
+    Returns one result per tx instead of raising on the first failure.
+    Identical txs in the batch are only verified once. With `timings` the
+    seconds of every FROST and ECDSA check are appended to its
+    "verify_frost" and "verify_ecdsa" lists.
+    """
+    frost_verifier.maybe_reload()
+    shield = bytes.fromhex(deposit_shield_address[2:])
+
+    verified: dict[bytes, bool] = {}
+    for tx in txs:
+        if tx in verified:
+            continue
+        if len(tx) <= 129:
+            verified[tx] = False
+            continue
+        msg = tx[:-129]
+        try:
+            start = time.perf_counter()
+            frost_verified = frost_verifier.verify(msg, tx[-129:-65])
+            frost_done = time.perf_counter()
+            verified[tx] = frost_verified and _verify_ecdsa_signature(
+                msg, tx[-65:], shield
+            )
+            if timings is not None:
+                timings["verify_frost"].append(frost_done - start)
+                if frost_verified:
+                    timings["verify_ecdsa"].append(time.perf_counter() - frost_done)
+        except Exception as e:
+            print(f"Deposit signature verification failed: {e}")
+            verified[tx] = False
+
+    return [verified[tx] for tx in txs]
+
+
 if __name__ == "__main__":
     tx = b"\x01dsep \x14\x00\x01 ~e3\r{TF\x0cWr\x83\xff\x89\x8a\x81\xc6\xb0f\n\x8d\x18q\xe6Y/\xbedU\xca\xa2@o\x8c\xbc\xf0\xb3B\xf6\xa9\x97\x87O\x8b\xf1C\n\xdeQ8\xe1Z\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x155\xb0\x06h\xdas\xea\x14_\xce\xb1\x8c\xf6+\xf7\x91\xd7\xaa\t1\xd3\x15\x9f\x95e\n\x04I\x00\xf9\x19\x1e\x14\x0c\xde\xeb\xb5\x14\x00]Q\xc7\xce\xfcJ\xa3\x19\xa2\xd8\r%w\xc0D-\xa0\xe2\x96\xc1\\\xaa\xb5\x03CL\xd7\x96Y\x17Y\x98\x00\x8be\xcd\x9a\x0b[\xb6\xaa1W\xa6e2\xb2\x7f\xdc\xb82\xb0\xcb\xc9S\xb5\xcb\x12I8\xf1v\xa49\xa1x\xe4\xa6\xe5\xc4\xa3\x02*\xf9\xcb\xeb\xaa\xfc\xaf,%\x08\x8a82\xdfD~,\x83S\xad\xfa\xb5-=\x93\x1f\x94&Y\x01?\xac\xc0\xee(bc%|\xec\x18f\xd65\xc3\xe2\x1b"
     verified = verify_deposit_tx(tx)
@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+import threading
+
+WITHDRAWALS_DB = os.environ.get("WITHDRAWALS_DB", "withdrawals.db")
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA cache_size=-65536;",  # 64 MiB
+    "PRAGMA mmap_size=268435456;",  # 256 MiB
+)
+
+# Withdrawal ids are assigned in order per chain, so (chain, id) is both the
+# primary key and the position of a withdrawal. WITHOUT ROWID stores the rows
+# in that key's b-tree, a page or an id lookup reads only the rows it returns.
+CREATE_WITHDRAWALS = """
+    CREATE TABLE IF NOT EXISTS withdrawals (
+        chain TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        token TEXT NOT NULL,
+        amount TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        t INTEGER NOT NULL,
+        PRIMARY KEY (chain, id)
+    ) WITHOUT ROWID;
+"""
+INSERT_WITHDRAWAL = """
+    INSERT OR IGNORE INTO withdrawals
+    (chain, id, token, amount, destination, user_id, t)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+# ids start at 0 without gaps, the count is the next id
+COUNT_WITHDRAWALS = "SELECT COALESCE(MAX(id) + 1, 0) FROM withdrawals WHERE chain = ?"
+WITHDRAWALS_RANGE = """
+    SELECT chain, id, token, amount, destination, user_id, t FROM withdrawals
+    WHERE chain = ? AND id >= ? AND id < ? ORDER BY id
+"""
+# one statement for any number of ids, passed as a JSON array
+WITHDRAWALS_BY_IDS = """
+    SELECT chain, id, token, amount, destination, user_id, t FROM withdrawals
+    WHERE chain = ? AND id IN (SELECT value FROM json_each(?))
+"""
+
+
+def _to_dict(row: tuple) -> dict:
+    chain, wid, token, amount, destination, user_id, t = row
+    return {
+        "chain": chain,
+        "id": wid,
+        "tokenContract": token,
+        "amount": amount,
+        "destination": destination,
+        "user_id": int(user_id),
+        "t": t,
+    }
+
+
+class WithdrawStore:
+    """Append-only withdrawals by chain, in the same shape as /withdraws."""
+
+    def __init__(self, path: str = WITHDRAWALS_DB):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def con(self) -> sqlite3.Connection:
+        # one connection per thread, sync routes run in the threadpool
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            for pragma in PRAGMAS:
+                con.execute(pragma)
+            self._local.con = con
+        return con
+
+    def init(self) -> None:
+        with self.con as con:
+            con.execute(CREATE_WITHDRAWALS)
+
+    def add(self, withdrawals: list[dict]) -> None:
+        """Store new withdrawals, ones whose (chain, id) exists are ignored."""
+        with self.con as con:
+            con.executemany(
+                INSERT_WITHDRAWAL,
+                [
+                    (
+                        w["chain"],
+                        w["id"],
+                        w["tokenContract"],
+                        w["amount"],
+                        w["destination"],
+                        str(w["user_id"]),
+                        w["t"],
+                    )
+                    for w in withdrawals
+                ],
+            )
+
+    def count(self, chain: str) -> int:
+        (count,) = self.con.execute(COUNT_WITHDRAWALS, (chain,)).fetchone()
+        return count
+
+    def page(self, chain: str, offset: int, limit: int) -> list[dict]:
+        rows = self.con.execute(WITHDRAWALS_RANGE, (chain, offset, offset + limit))
+        return [_to_dict(row) for row in rows]
+
+    def get_many(self, chain: str, ids: list[int]) -> list[dict]:
+        """Withdrawals of `ids` in the given order, unknown ids are skipped."""
+        rows = self.con.execute(WITHDRAWALS_BY_IDS, (chain, json.dumps(ids)))
+        found = {row[1]: row for row in rows}
+        return [_to_dict(found[wid]) for wid in ids if wid in found]